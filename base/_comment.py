@@ -637,6 +637,13 @@ def decode(data, default=u''):
     if not data:
         return {}
 
+    # if there's no tag prefix anywhere in the data, then none of the lines can
+    # be decoded and they all get collected into the default key. so, we can
+    # skip the parser and just join the lines the same way that it would.
+    elif tag.name.prefix not in data:
+        lines = data.split(u'\n')
+        return {default: u'\n'.join([line for line in lines[:-1] if line] + lines[-1:])}
+
     # iterate through each line in the data so that we can collect it
     # into our result dictionary.
     result = {}
@@ -709,6 +716,11 @@ def encode(dict):
 
 def check(data):
     '''Check that the string `data` has the correct format by trying to decode it.'''
+
+    # if there's no tag prefix in the data, then there's nothing that can be decoded.
+    if tag.name.prefix not in (data or ''):
+        return False
+
     res = map(iter, (data or '').split('\n'))
     try:
         [tag.decode(item) for item in res]
@@ -1125,6 +1137,174 @@ class contents(tagging):
             _, result = cls._write(key, address, item), result + refs
         return result
 
+    @classmethod
+    def inc_many(cls, address, names, **target):
+        """Increase the ref count for the given `address` and each of the specified `names` belonging to the function `target`.
+
+        If `target` is undefined or ``None`` then use `address` to locate the function.
+        """
+        names, result = [name for name in names], 0
+
+        # If we weren't given any names, then there's nothing to update. We need to
+        # leave early so that we don't store an empty count for the address.
+        if not names:
+            return result
+
+        if target.get('target', None) is None:
+            res = cls._key(address)
+            keys = res if isinstance(res, list) else [res]
+        else:
+            keys = target['target'] if isinstance(target['target'], list) else [target['target']]
+
+        # Iterate through all of the keys so that we only need to read and write
+        # the cache once for each of them, updating every name in between.
+        for key in keys:
+            item = cls._read(key, address) or {}
+            state, cache = item.get(cls.__tags__, {}), item.get(cls.__address__, {})
+
+            # Update the reference count for each of the names we were given, and
+            # the count for the address by the number of names that were added.
+            for name in names:
+                state[name] = refs = state.get(name, 0) + 1
+                result += refs
+            cache[address] = cache.get(address, 0) + len(names)
+
+            # Figure out whether we're removing the entries or adding them.
+            if state: item[cls.__tags__] = state
+            else: item.pop(cls.__tags__, None)
+
+            if cache: item[cls.__address__] = cache
+            else: item.pop(cls.__address__, None)
+
+            cls._write(key, address, item)
+        return result
+
+    @classmethod
+    def dec_many(cls, address, names, **target):
+        """Decrease the ref count for the given `address` and each of the specified `names` belonging to the function `target`.
+
+        If `target` is undefined or ``None`` then use `address` to locate the function.
+        """
+        names, result = [name for name in names], 0
+
+        # If we weren't given any names, then there's nothing to update. We need to
+        # leave early so that we don't store an empty count for the address.
+        if not names:
+            return result
+
+        if target.get('target', None) is None:
+            res = cls._key(address)
+            keys = res if isinstance(res, list) else [res]
+        else:
+            keys = target['target'] if isinstance(target['target'], list) else [target['target']]
+
+        # Iterate through all of the keys so that we only need to read and write
+        # the cache once for each of them, updating every name in between.
+        for key in keys:
+            item = cls._read(key, address) or {}
+            state, cache = item.get(cls.__tags__, {}), item.get(cls.__address__, {})
+
+            # Pop and adjust the reference count for each name so that any of them
+            # that drop below their minimum are removed. Then we can do the same
+            # for the address, but using the number of names that we were given.
+            for name in names:
+                refs = state.pop(name, 0) - 1
+                if refs > 0: state[name] = refs
+                result += refs
+
+            count = cache.pop(address, 0) - len(names)
+            if count > 0: cache[address] = count
+
+            # Figure out whether we're removing the entries or keeping them.
+            if state: item[cls.__tags__] = state
+            else: item.pop(cls.__tags__, None)
+
+            if cache: item[cls.__address__] = cache
+            else: item.pop(cls.__address__, None)
+
+            cls._write(key, address, item)
+        return result
+
+    @classmethod
+    def inc_all(cls, items, **target):
+        """Increase the ref counts for each address and its names from the dictionary `items` belonging to the function `target`.
+
+        If `target` is undefined or ``None`` then use each address to locate its function.
+        """
+        batches = cls.__batch(items, target.get('target', None))
+
+        # Now we can read the cache for each key once, update the counts for
+        # every address that belongs to it, and then write it back only once.
+        result = 0
+        for key, addresses in batches.items():
+            item = cls._read(key, addresses[0][0]) or {}
+            state, cache = item.get(cls.__tags__, {}), item.get(cls.__address__, {})
+
+            for address, names in addresses:
+                for name in names:
+                    state[name] = refs = state.get(name, 0) + 1
+                    result += refs
+                cache[address] = cache.get(address, 0) + len(names)
+
+            if state: item[cls.__tags__] = state
+            else: item.pop(cls.__tags__, None)
+
+            if cache: item[cls.__address__] = cache
+            else: item.pop(cls.__address__, None)
+
+            cls._write(key, addresses[0][0], item)
+        return result
+
+    @classmethod
+    def dec_all(cls, items, **target):
+        """Decrease the ref counts for each address and its names from the dictionary `items` belonging to the function `target`.
+
+        If `target` is undefined or ``None`` then use each address to locate its function.
+        """
+        batches = cls.__batch(items, target.get('target', None))
+
+        # Read the cache for each key once, adjust the counts for every address
+        # that belongs to it (removing the ones that hit zero), and write it back.
+        result = 0
+        for key, addresses in batches.items():
+            item = cls._read(key, addresses[0][0]) or {}
+            state, cache = item.get(cls.__tags__, {}), item.get(cls.__address__, {})
+
+            for address, names in addresses:
+                for name in names:
+                    refs = state.pop(name, 0) - 1
+                    if refs > 0: state[name] = refs
+                    result += refs
+
+                count = cache.pop(address, 0) - len(names)
+                if count > 0: cache[address] = count
+
+            if state: item[cls.__tags__] = state
+            else: item.pop(cls.__tags__, None)
+
+            if cache: item[cls.__address__] = cache
+            else: item.pop(cls.__address__, None)
+
+            cls._write(key, addresses[0][0], item)
+        return result
+
+    @classmethod
+    def __batch(cls, items, target):
+        '''Group the addresses and their names from the dictionary `items` by the key of the function that they should be written to.'''
+        res = {}
+        for address, names in items.items():
+            names = [name for name in names]
+            if not names:
+                continue
+
+            # If we weren't given a target, then we need to use the address to
+            # figure out which function keys the address should be added to.
+            key = cls._key(address) if target is None else target
+            for key in (key if isinstance(key, list) else [key]):
+                res.setdefault(key, []).append((address, names))
+            continue
+        return res
+
     @classmethod
     def name(cls, address, **target):
         """Return all the tag names (``set``) for the contents of the function `target`.
@@ -1265,6 +1445,96 @@ class globals(tagging):
 
         return cName
 
+    @classmethod
+    def inc_many(cls, address, names):
+        '''Increase the global tag count for the given `address` and each of the specified `names`.'''
+        node, result, count = tagging.node(), 0, 0
+        for name in names:
+            eName = internal.utils.string.to(name)
+            cName = (internal.netnode.hash.get(node, eName, type=int) or 0) + 1
+            internal.netnode.hash.set(node, eName, cName)
+            result, count = result + cName, count + 1
+
+        # Now we can update the address by the number of names that were added.
+        if count:
+            cAddress = (internal.netnode.alt.get(node, address) or 0) + count
+            internal.netnode.alt.set(node, address, cAddress)
+        return result
+
+    @classmethod
+    def dec_many(cls, address, names):
+        '''Decrease the global tag count for the given `address` and each of the specified `names`.'''
+        node, result, count = tagging.node(), 0, 0
+        for name in names:
+            eName = internal.utils.string.to(name)
+            cName = (internal.netnode.hash.get(node, eName, type=int) or 1) - 1
+            if cName < 1:
+                internal.netnode.hash.remove(node, eName)
+            else:
+                internal.netnode.hash.set(node, eName, cName)
+            result, count = result + cName, count + 1
+
+        # Now we can update the address by the number of names that were removed.
+        if count:
+            cAddress = (internal.netnode.alt.get(node, address) or count) - count
+            if cAddress < 1:
+                internal.netnode.alt.remove(node, address)
+            else:
+                internal.netnode.alt.set(node, address, cAddress)
+        return result
+
+    @classmethod
+    def inc_all(cls, items):
+        '''Increase the global tag counts for each address and its names from the dictionary `items`.'''
+        node, counts, result = tagging.node(), {}, 0
+
+        # Total up the number of references for each name so that we only need
+        # to update each one once, and then adjust each address by its count.
+        for address, names in items.items():
+            count = 0
+            for name in names:
+                counts[name], count = counts.get(name, 0) + 1, count + 1
+            if count:
+                cAddress = (internal.netnode.alt.get(node, address) or 0) + count
+                internal.netnode.alt.set(node, address, cAddress)
+            continue
+
+        for name, count in counts.items():
+            eName = internal.utils.string.to(name)
+            cName = (internal.netnode.hash.get(node, eName, type=int) or 0) + count
+            internal.netnode.hash.set(node, eName, cName)
+            result += cName
+        return result
+
+    @classmethod
+    def dec_all(cls, items):
+        '''Decrease the global tag counts for each address and its names from the dictionary `items`.'''
+        node, counts, result = tagging.node(), {}, 0
+
+        # Total up the number of references for each name so that we only need
+        # to update each one once, and then adjust each address by its count.
+        for address, names in items.items():
+            count = 0
+            for name in names:
+                counts[name], count = counts.get(name, 0) + 1, count + 1
+            if count:
+                cAddress = (internal.netnode.alt.get(node, address) or count) - count
+                if cAddress < 1:
+                    internal.netnode.alt.remove(node, address)
+                else:
+                    internal.netnode.alt.set(node, address, cAddress)
+            continue
+
+        for name, count in counts.items():
+            eName = internal.utils.string.to(name)
+            cName = (internal.netnode.hash.get(node, eName, type=int) or count) - count
+            if cName < 1:
+                internal.netnode.hash.remove(node, eName)
+            else:
+                internal.netnode.hash.set(node, eName, cName)
+            result += cName
+        return result
+
     @classmethod
     def name(cls):
         '''Return all the tag names (``set``) in the specified database (globals and func-tags)'''
@@ -1292,6 +1562,15 @@ class globals(tagging):
         internal.netnode.alt.set(node, address, count)
         return res
 
+    @classmethod
+    def has(cls, start, stop):
+        '''Return whether there are any global tags from the address `start` up to `stop` (exclusive).'''
+        node = tagging.node()
+        if internal.netnode.alt.get(node, start):
+            return True
+        ea = internal.netnode.alt.follow(node, start)
+        return ea is not None and ea < stop
+
     @classmethod
     def iterate(cls):
         '''Yield the address and count for each of the globals in the database according to what is written in the altvals.'''
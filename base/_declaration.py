@@ -8,7 +8,7 @@ TODO: Implement parsers for some of the C++ symbol manglers in order to
       query them for specific attributes or type information.
 """
 
-import internal, idaapi
+import six, internal, idaapi
 import string as _string
 
 ### c declaration stuff
@@ -57,6 +57,30 @@ def mangledQ(string):
     '''Return true if the provided `string` has been mangled.'''
     return any(string.startswith(item) for item in ['?', '__'])
 
+class _typename_table(dict):
+    """
+    This is a table that is used with a string's `translate` method in
+    order to replace each character that IDA does not consider valid within
+    a type name with an underscore. The validity of each character is only
+    queried from IDA the first time it is encountered, and then cached.
+    """
+
+    # characters that are allowed in a name despite IDA not considering them
+    # valid when they are checked individually (as the start of a type name).
+    valid = frozenset(_string.digits) | {':'}
+
+    def __missing__(self, ordinal):
+        character = six.unichr(ordinal)
+        valid = character in self.valid or idaapi.is_valid_typename(internal.utils.string.to(character))
+        self[ordinal] = result = character if valid else u'_'
+        return result
+__typename_table__ = _typename_table()
+
+@internal.utils.string.decorate_arguments('name')
+def typename(name):
+    '''Return the string `name` with any characters that are not valid within a type name replaced with an underscore.'''
+    return name.translate(__typename_table__)
+
 @internal.utils.string.decorate_arguments('info')
 def parse(info):
     '''Parse the string `info` into an ``idaapi.tinfo_t``.'''
@@ -89,6 +113,9 @@ def string(ti):
     flags = idaapi.PRTYPE_DEF | idaapi.PRTYPE_MULTI
     return idaapi.print_tinfo(prefix, indent, cindent, flags, ti, name, cmt)
 
+# calling conventions that can be found within a demangled name.
+__conventions__ = frozenset({'__cdecl', '__stdcall', '__fastcall', '__thiscall', '__pascal', '__usercall', '__userpurge'})
+
 def unmangle_name(name):
     '''Return the function name from a prototype to be used for rendered an ``idaapi.tino_t``.'''
 
@@ -112,9 +139,8 @@ def unmangle_name(name):
 
     # Now we need to remove the calling convention as it should be in the typeinfo.
     items = notemplates.split(' ')
-    conventions = {'__cdecl', '__stdcall', '__fastcall', '__thiscall', '__pascal', '__usercall', '__userpurge'}
     try:
-        ccindex = next(idx for idx, item in enumerate(items) if any(item.endswith(cc) for cc in conventions))
+        ccindex = next(idx for idx, item in enumerate(items) if any(item.endswith(cc) for cc in __conventions__))
         items = items[1 + ccindex:]
 
     # We couldn't find a calling convention, so there's no real work to do.
@@ -10,7 +10,7 @@ individuals to attempt to understand this craziness.
 import six, builtins
 import sys, logging, contextlib
 import functools, operator, itertools, types
-import collections, heapq, traceback, ctypes, math
+import collections, bisect, traceback, ctypes, math
 import unicodedata as _unicodedata, string as _string, array as _array
 
 import idaapi, internal
@@ -636,9 +636,10 @@ class prioritybase(object):
         # discard any callables already attached to the specified target
         self.discard(target, callable)
 
-        # add the callable to our priority queue
+        # add the callable to our priority queue, keeping it sorted by priority
+        # so that the closure doesn't need to sort it every time it's dispatched.
         queue = self.__cache__[target]
-        heapq.heappush(queue, internal.utils.priority_tuple(priority, callable))
+        bisect.insort_right(queue, internal.utils.priority_tuple(priority, callable))
 
         # preserve a backtrace so we can track where our callable is at
         self.__traceback[(target, callable)] = traceback.extract_stack()[:-1]
@@ -748,11 +749,13 @@ class prioritybase(object):
             if target not in self.__cache__ or target in self.__disabled:
                 return
 
-            # Iterate through our priorityqueue extracting each callable and
-            # executing it with the parameters we received
+            # Iterate through our priorityqueue (which is already sorted) extracting
+            # each callable and executing it with the parameters we received
             hookq, captured = self.__cache__[target][:], None
-            for priority, callable in heapq.nsmallest(len(hookq), hookq, key=operator.attrgetter('priority')):
-                logging.debug(u"{:s}.callable({:s}) : Dispatching parameters ({:s}) to callable ({!s}) with priority ({:+d}).".format('.'.join([__name__, self.__class__.__name__]), ', '.join(map("{!r}".format, parameters)), ', '.join(map("{!r}".format, parameters)), callable, priority))
+            debug = logging.root.isEnabledFor(logging.DEBUG)
+            for priority, callable in hookq:
+                if debug:
+                    logging.debug(u"{:s}.callable({:s}) : Dispatching parameters ({:s}) to callable ({!s}) with priority ({:+d}).".format('.'.join([__name__, self.__class__.__name__]), ', '.join(map("{!r}".format, parameters)), ', '.join(map("{!r}".format, parameters)), callable, priority))
 
                 try:
                     result = callable(*parameters)
@@ -1538,6 +1541,15 @@ class range(object):
         left, right = cls.unpack(area)
         return right - left
 
+    @classmethod
+    def heads(cls, start, stop):
+        '''Return a tuple containing the address `start` and each item head that follows it up to `stop` (exclusive).'''
+        result, ea = [], start
+        while ea != idaapi.BADADDR and ea < stop:
+            result.append(ea)
+            ea = idaapi.next_not_tail(ea)
+        return tuple(result)
+
 class node(object):
     """
     This namespace contains a number of methods that extract information
@@ -2643,6 +2655,9 @@ class tinfo(object):
         idaapi.ALOC_REG2: operator.methodcaller('get_reginfo'),
     }
 
+    # A lookup table for the names of each location type for displaying to the user.
+    location_names = {getattr(idaapi, attribute) : attribute for attribute in dir(idaapi) if attribute.startswith('ALOC_')}
+
     # Define a throwaway closure that we use for entering and recursing
     # into the location_table. This is needed because scattered types
     # are recursive, and we want to return everything that we can.
@@ -2748,7 +2763,7 @@ class tinfo(object):
 
         # FIXME: We're not supporting this because I've never used this fucker.
         elif loctype in {idaapi.ALOC_CUSTOM}:
-            ltypes = {getattr(idaapi, attribute) : attribute for attribute in dir(idaapi) if attribute.startswith('ALOC_')}
+            ltypes = cls.location_names
             raise NotImplementedError(u"{:s}.location({!r}, {!r}, {:d}, {!r}, ...) : Unable to decode location of type {:s} that uses the specified information ({!s}).".format('.'.join([__name__, cls.__name__]), "{!s}".format(ti), architecture, loctype, locinfo, "{:s}({:d})".format(ltypes[loctype], loctype) if loctype in ltypes else "{:d}".format(loctype), locinfo))
 
         # Anything else we just return, because we have no context to even
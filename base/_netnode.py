@@ -529,6 +529,27 @@ class alt(object):
         node = utils.get(nodeidx)
         return netnode.altdel(node, index, tag or netnode.alttag)
 
+    @classmethod
+    def move(cls, nodeidx, items, tag=None):
+        """Move the integers from each `(source, target)` index in `items` of the "altval" array belonging to the netnode identified by `nodeidx`.
+
+        Every source index is removed before any of the targets are assigned so
+        that the indices are allowed to overlap. Return a list of each `(source,
+        target, value)` that was unable to be assigned.
+        """
+        node, tag = utils.get(nodeidx), tag or netnode.alttag
+        items = [(source, target, netnode.altval(node, source, tag)) for source, target in items]
+        for source, _, _ in items:
+            netnode.altdel(node, source, tag)
+        return [(source, target, value) for source, target, value in items if not netnode.altset(node, target, value, tag)]
+
+    @classmethod
+    def follow(cls, nodeidx, index, tag=None):
+        '''Return the first index after `index` of the "altval" array belonging to the netnode identified by `nodeidx`, or ``None`` if there isn't one.'''
+        node = utils.get(nodeidx)
+        res = netnode.altnext(node, index, tag or netnode.alttag)
+        return None if res in {None, idaapi.BADADDR} else res
+
     @classmethod
     def fiter(cls, nodeidx, tag=None):
         '''Iterate through all of the indexes of the "altval" array belonging to the netnode identified by `nodeidx` in order.'''
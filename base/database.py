@@ -2173,9 +2173,7 @@ def tag(ea):
             ti = type(ea)
 
             # Filter the name we're going to render with so that it can be parsed properly.
-            valid = {item for item in string.digits} | {':'}
-            filtered = str().join(item if item in valid or idaapi.is_valid_typename(utils.string.to(item)) else '_' for item in realname)
-            validname = ''.join(filtered)
+            validname = internal.declaration.typename(realname)
 
             # Demangle just the name if it's mangled in some way, and use it to render
             # the typeinfo to return.
@@ -5546,7 +5544,7 @@ class types(object):
         iterable = (item for item in name)
         item = builtins.next(iterable, '_')
         identifier = item if idaapi.is_valid_typename(utils.string.to(item)) else '_'
-        identifier+= str().join(item if idaapi.is_valid_typename(identifier + utils.string.to(item)) else '_' for item in iterable)
+        identifier+= str().join([item if idaapi.is_valid_typename(identifier + utils.string.to(item)) else '_' for item in iterable])
 
         # we need to now assign the serialized data we were given, making sure
         # that any of the any of the comments are properly being passed as bytes
@@ -5663,7 +5661,7 @@ class types(object):
         iterable = (item for item in name)
         item = builtins.next(iterable, '_')
         identifier = item if idaapi.is_valid_typename(utils.string.to(item)) else '_'
-        identifier+= str().join(item if idaapi.is_valid_typename(identifier + utils.string.to(item)) else '_' for item in iterable)
+        identifier+= str().join([item if idaapi.is_valid_typename(identifier + utils.string.to(item)) else '_' for item in iterable])
 
         # we can now assign the serialized data that we got, making sure that
         # the comments are properly being passed as bytes before checking for error.
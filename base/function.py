@@ -29,6 +29,24 @@ from internal import utils, interface, exceptions as E
 
 import idaapi
 
+# version-specific functions for fetching or guessing the type information at an address.
+_get_tinfo = (lambda ti, ea: idaapi.get_tinfo2(ea, ti)) if idaapi.__version__ < 7.0 else idaapi.get_tinfo
+_guess_tinfo = (lambda ti, ea: idaapi.guess_tinfo2(ea, ti)) if idaapi.__version__ < 7.0 else idaapi.guess_tinfo
+
+# version-specific function for fetching the type library belonging to the database.
+_get_idati = (lambda: idaapi.cvar.idati) if idaapi.__version__ < 7.0 else idaapi.get_idati
+
+# lookup table for the calling conventions that can be applied by name, and the
+# same table keyed by each of the lowercase names that a user may specify for one.
+_cclookup = {
+    '__cdecl': idaapi.CM_CC_CDECL,
+    '__stdcall': idaapi.CM_CC_STDCALL,
+    '__pascal': idaapi.CM_CC_PASCAL,
+    '__fastcall': idaapi.CM_CC_FASTCALL,
+    '__thiscall': idaapi.CM_CC_THISCALL,
+}
+_cclookup_normalized = {variation : cc for name, cc in _cclookup.items() for prefixed in [name, name[:-len('call')] if name.endswith('call') else name] for variation in [prefixed, prefixed[len('__'):]]}
+
 ## searching
 @utils.multicase()
 def by_address():
@@ -1412,7 +1430,7 @@ class blocks(object):
 
             # And(&) includes tags only if the address includes all of the specified tagnames.
             if And:
-                if And & six.viewkeys(address) == And:
+                if And <= six.viewkeys(address):
                     collected.update({key : value for key, value in address.items() if key in And})
                 else: continue
 
@@ -2374,6 +2392,12 @@ class frame(object):
 
         """
 
+        # lookup table used to deserialize the integral type for a number of bits.
+        __tilookup__ = {
+            8: idaapi.BT_INT8, 16: idaapi.BT_INT16, 32: idaapi.BT_INT32,
+            64: idaapi.BT_INT64, 128: idaapi.BT_INT128, 80: idaapi.BTF_TBYTE,
+        }
+
         @utils.multicase()
         def __new__(cls):
             '''Yield the `(offset, name, size)` of each argument belonging to the current function.'''
@@ -2394,7 +2418,8 @@ class frame(object):
                 # when yielding our results.
                 items = []
                 for index in builtins.range(ftd.size()):
-                    arg, loc = ftd[index], ftd[index].argloc
+                    arg = ftd[index]
+                    loc = arg.argloc
 
                     # not allocated on the stack? then we skip it..
                     if loc.atype() != idaapi.ALOC_STACK:
@@ -2513,7 +2538,7 @@ class frame(object):
             items = idaapi.get_arg_addrs(ea)
             if items is None:
                 raise E.DisassemblerError(u"{:s}.location({:#x}) : Unable to retrieve the initialization addresses for the arguments to the function call at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, ea))
-            return [ea for ea in items]
+            return builtins.list(items)
         @utils.multicase(ea=six.integer_types, index=six.integer_types)
         @classmethod
         def location(cls, ea, index):
@@ -2524,6 +2549,81 @@ class frame(object):
             return items[index]
         locations = utils.alias(location, 'frame.args')
 
+        @classmethod
+        def __regargs__(cls, caller, ea, fn):
+            '''Yield the `(register, type, regarg)` for each register argument stored within the ``idaapi.func_t`` of `fn` located at `ea` on behalf of the method named `caller`.'''
+            bits, tilookup = database.config.bits(), cls.__tilookup__
+            items = []
+
+            # If regargqty is set, but regargs is None...then we need to call read_regargs on our
+            # fn to get IDA to actually read it...The funny thing is, on earlier versions of IDA
+            # it seems that read_regargs won't always allocate an iterator...so this means that
+            # we manually make it a list and then this way we can iterate through the fucker.
+            idaapi.read_regargs(fn) if fn.regargs is None else None
+            if isinstance(fn.regargs, idaapi.regarg_t):
+                regargs = [fn.regargs]
+            else:
+                regargs = [fn.regargs[index] for index in builtins.range(fn.regargqty)]
+
+            # Iterate through all of our arguments and grab the register, the type information, and
+            # argument name out of the register argument.
+            for index, regarg in enumerate(regargs):
+                ti = idaapi.tinfo_t()
+
+                # Deserialize the type information that we received from the register argument.
+                if ti.deserialize(None, regarg.type, None):
+                    items.append((regarg, ti))
+
+                # If we failed, then log a warning and try to append a void* as a placeholder.
+                elif ti.deserialize(None, bytes(bytearray([idaapi.BT_PTR, idaapi.BT_VOID])), None):
+                    logging.warning(u"{:s}.{:s}({:#x}) : Using the type {!r} as a placeholder due to being unable to decode the type information ({!s}) for the argument at index {:d}.".format('.'.join([__name__, cls.__name__]), caller, ea, ti._print(), regarg.type, index))
+                    items.append((regarg, ti))
+
+                # If we couldn't even create a void*, then this is a critical failure and we
+                # really need to get the argument size correct. So, we just look it up.
+                else:
+                    if not operator.contains(tilookup, bits) or not ti.deserialize(None, bytes(bytearray([tilookup[bits]])), None):
+                        raise E.DisassemblerError(u"{:s}.{:s}({:#x}) : Unable to create a type that fits within the number of bits for the database ({:d}).".format('.'.join([__name__, cls.__name__]), caller, ea, bits))
+                    logging.critical(u"{:s}.{:s}({:#x}) : Falling back to the type {!r} as a placeholder due to being unable to cast the type information ({!r}) for the argument at index {:d}.".format('.'.join([__name__, cls.__name__]), caller, ea, ti._print(), regarg.type, index))
+                    items.append((regarg, ti))
+                continue
+
+            # Now that we have the regarg and its tinfo_t, we just need to extract
+            # its properties to turn it into a register_t. The name is left for the caller.
+            for regarg, ti in items:
+                try:
+                    reg = instruction.architecture.by_indexsize(regarg.reg, ti.get_size())
+                except KeyError:
+                    reg = instruction.architecture.by_index(regarg.reg)
+                yield reg, ti, regarg
+
+        @classmethod
+        def __arglocations__(cls, ea):
+            '''Yield the `(location, type, name)` decoded from the type information for each argument of the function at `ea`.'''
+            tinfo = type(ea)
+            _, ftd = interface.tinfo.function_details(ea, tinfo)
+
+            # Now we just need to iterate through our parameters collecting the
+            # raw location information for all of them. We preserve the type
+            # information in case we're unable to find the argument in a member.
+            items = []
+            for index in builtins.range(ftd.size()):
+                arg = ftd[index]
+                loc = arg.argloc
+                items.append((index, utils.string.of(arg.name), arg.type, interface.tinfo.location_raw(loc)))
+
+            # Now we can decode each location. If it's a tuple containing a register
+            # and its second item is an integer that's zero, then we can simply
+            # exclude the offset so that only the register is returned.
+            for index, name, ti, location in items:
+                atype, ainfo = location
+                loc = interface.tinfo.location(ti.get_size(), instruction.architecture, atype, ainfo)
+                if not isinstance(loc, interface.location_t) and isinstance(loc, builtins.tuple) and any(isinstance(item, interface.register_t) for item in loc):
+                    reg, offset = loc
+                    loc = loc if offset else reg
+                yield loc, ti, name
+            return
+
         @utils.multicase()
         @classmethod
         def iterate(cls):
@@ -2540,11 +2640,8 @@ class frame(object):
             Fproblem = builtins.next((getattr(idaapi, candidate) for candidate in ['is_problem_present', 'QueueIsPresent'] if hasattr(idaapi, candidate)), utils.fconstant(False))
             PR_BADSTACK = getattr(idaapi, 'PR_BADSTACK', 0xb)
 
-            # Build a lookup table that we'll use to deserialize the correct type for each size.
-            bits, tilookup = database.config.bits(), {
-                8: idaapi.BT_INT8, 16: idaapi.BT_INT16, 32: idaapi.BT_INT32,
-                64: idaapi.BT_INT64, 128: idaapi.BT_INT128, 80: idaapi.BTF_TBYTE,
-            }
+            # Grab the lookup table that we'll use to deserialize the correct type for each size.
+            bits, tilookup = database.config.bits(), cls.__tilookup__
 
             # Then build an array_type_data_t for absolutely everything else.
             at, byte = idaapi.array_type_data_t(), idaapi.tinfo_t()
@@ -2560,48 +2657,7 @@ class frame(object):
                 # If our function's regargqty is larger than zero, then we're supposed to extract the
                 # regargs directly out of the func_t.
                 elif fn.regargqty:
-                    items = []
-
-                    # If regargqty is set, but regargs is None...then we need to call read_regargs on our
-                    # fn to get IDA to actually read it...The funny thing is, on earlier versions of IDA
-                    # it seems that read_regargs won't always allocate an iterator...so this means that
-                    # we manually make it a list and then this way we can iterate through the fucker.
-                    idaapi.read_regargs(fn) if fn.regargs is None else None
-                    if isinstance(fn.regargs, idaapi.regarg_t):
-                        regargs = [fn.regargs]
-                    else:
-                        regargs = [fn.regargs[index] for index in builtins.range(fn.regargqty)]
-
-                    # Iterate through all of our arguments and grab the register, the type information, and
-                    # argument name out of the register argument.
-                    for index, regarg in enumerate(regargs):
-                        ti = idaapi.tinfo_t()
-
-                        # Deserialize the type information that we received from the register argument.
-                        if ti.deserialize(None, regarg.type, None):
-                            items.append((regarg, ti))
-
-                        # If we failed, then log a warning and try to append a void* as a placeholder.
-                        elif ti.deserialize(None, bytes(bytearray([idaapi.BT_PTR, idaapi.BT_VOID])), None):
-                            logging.warning(u"{:s}.iterate({:#x}) : Using the type {!r} as a placeholder due to being unable to decode the type information ({!s}) for the argument at index {:d}.".format('.'.join([__name__, cls.__name__]), ea, ti._print(), regarg.type, index))
-                            items.append((regarg, ti))
-
-                        # If we couldn't even create a void*, then this is a critical failure and we
-                        # really need to get the argument size correct. So, we just look it up.
-                        else:
-                            if not operator.contains(tilookup, bits) or not ti.deserialize(None, bytes(bytearray([tilookup[bits]])), None):
-                                raise E.DisassemblerError(u"{:s}.iterate({:#x}) : Unable to create a type that fits within the number of bits for the database ({:d}).".format('.'.join([__name__, cls.__name__]), ea, bits))
-                            logging.critical(u"{:s}.iterate({:#x}) : Falling back to the type {!r} as a placeholder due to being unable to cast the type information ({!r}) for the argument at index {:d}.".format('.'.join([__name__, cls.__name__]), ea, ti._print(), regarg.type, index))
-                            items.append((regarg, ti))
-                        continue
-
-                    # Now that we have the regarg and its tinfo_t, we just need to extract
-                    # its properties to turn it into a register_t and grab its name.
-                    for regarg, ti in items:
-                        try:
-                            reg = instruction.architecture.by_indexsize(regarg.reg, ti.get_size())
-                        except KeyError:
-                            reg = instruction.architecture.by_index(regarg.reg)
+                    for reg, ti, regarg in cls.__regargs__('iterate', ea, fn):
                         yield reg, ti, utils.string.of(regarg.name)
 
                     # We processed the registers, so we can fallthrough to the next one.
@@ -2644,24 +2700,10 @@ class frame(object):
                 return
 
             # If we got here, then we have type information that we can grab out
-            # of the given address. Once we have it, rip the details out o it.
-            tinfo = type(ea)
-            _, ftd = interface.tinfo.function_details(ea, tinfo)
-
-            # Now we just need to iterate through our parameters collecting the
-            # raw location information for all of them. We preserve the type
-            # information in case we're unable to find the argument in a member.
-            items = []
-            for index in builtins.range(ftd.size()):
-                arg, loc = ftd[index], ftd[index].argloc
-                items.append((index, utils.string.of(arg.name), arg.type, interface.tinfo.location_raw(loc)))
-
-            # Last thing that we need to do is to extract each location and
-            # figure out whether we return it as a register or an actual member.
+            # of the given address. Last thing that we need to do is to extract each
+            # location and figure out whether we return it as a register or an actual member.
             fr = None if rt else frame(ea) if idaapi.get_frame(ea) else None
-            for index, name, ti, location in items:
-                atype, ainfo = location
-                loc = interface.tinfo.location(ti.get_size(), instruction.architecture, atype, ainfo)
+            for loc, ti, name in cls.__arglocations__(ea):
 
                 # If it's a location, then we can just add the register size to
                 # find where the member is located at. This becomes our result
@@ -2678,16 +2720,8 @@ class frame(object):
                     finally:
                         yield item, ti, name or aname
 
-                # If it's a tuple, then we check if it contains any registers
-                # so that way we can process them if necessary. If its a register
-                # offset where its second item is an integer and it's zero, then
-                # we can simply exclude the offset from our results.
-                elif isinstance(loc, builtins.tuple) and any(isinstance(item, interface.register_t) for item in loc):
-                    reg, offset = loc
-                    yield loc if offset else reg, ti, name
-
-                # Otherwise, it's one of the custom locations that we don't
-                # support. So we can just return it as we received it.
+                # Otherwise, it's either a register or one of the custom locations
+                # that we don't support. So we can just return it as we received it.
                 else:
                     yield loc, ti, name
                 continue
@@ -2702,10 +2736,21 @@ class frame(object):
         @classmethod
         def registers(cls, func):
             '''Return the register information associated with the arguments of the function `func`.'''
-            result = []
-            for reg, ti, name in cls.iterate(func):
-                result.append(reg) if any([isinstance(reg, interface.register_t), isinstance(reg, builtins.tuple) and all(isinstance(item, interface.register_t) for item in reg)]) else None
-            return result
+            rt, ea = interface.addressOfRuntimeOrStatic(func)
+            fn = None if rt else by(ea)
+            Fregister = lambda reg: isinstance(reg, interface.register_t) or isinstance(reg, builtins.tuple) and all(isinstance(item, interface.register_t) for item in reg)
+
+            # If there's no type information, then the only registers that we can return are
+            # the ones from the func_t. Anything found within the frame is never a register.
+            if not type.has_typeinfo(ea):
+                if not fn:
+                    logging.warning(u"{:s}.registers({:#x}) : Unable to iterate through the arguments for the given function ({:#x}) due to missing type information.".format('.'.join([__name__, cls.__name__]), ea, ea))
+                    return []
+                return [reg for reg, _, _ in cls.__regargs__('registers', ea, fn)] if fn.regargqty else []
+
+            # Otherwise we only need the location of each parameter from the type information,
+            # and we can skip looking them up in the frame.
+            return [loc for loc, _, _ in cls.__arglocations__(ea) if Fregister(loc)]
         regs = utils.alias(registers, 'frame.args')
 
         @utils.multicase()
@@ -2718,9 +2763,15 @@ class frame(object):
         def size(cls, func):
             '''Returns the size of the arguments for the function `func`.'''
             fn = by(func)
-            max = structure.size(get_frameid(fn))
-            total = frame.lvars.size(fn) + frame.regs.size(fn)
-            return max - total
+
+            # figure out the frame so that we can get its total size.
+            fr = idaapi.get_frame(fn)
+            if fr is None:
+                raise E.MissingTypeOrAttribute(u"{:s}.size({:#x}) : Unable to get the function frame.".format('.'.join([__name__, cls.__name__]), interface.range.start(fn)))
+
+            # the arguments are whatever is left after the lvars and the saved registers (including pc).
+            total = fn.frsize + fn.frregs + database.config.bits() // 8
+            return idaapi.get_struc_size(fr) - total
     args = arg = arguments  # XXX: ns alias
 
     class lvars(object):
@@ -2747,10 +2798,8 @@ class frame(object):
             if fr is None:  # unable to figure out arguments
                 raise E.MissingTypeOrAttribute(u"{:s}({:#x}) : Unable to get the function frame.".format('.'.join([__name__, cls.__name__]), interface.range.start(fn)))
 
-            results = []
-            for off, size, content in structure.fragment(fr.id, 0, fn.frsize):
-                results.append((off - sum([fn.frsize, fn.frregs]), content.get('__name__', None), size))
-            return results
+            base = fn.frsize + fn.frregs
+            return [(off - base, content.get('__name__', None), size) for off, size, content in structure.fragment(fr.id, 0, fn.frsize)]
 
         @utils.multicase()
         @classmethod
@@ -2790,10 +2839,8 @@ class frame(object):
             if fr is None:  # unable to figure out arguments
                 raise E.MissingTypeOrAttribute(u"{:s}({:#x}) : Unable to get the function frame.".format('.'.join([__name__, cls.__name__]), interface.range.start(fn)))
 
-            results = []
-            for off, size, content in structure.fragment(fr.id, fn.frsize, sum([fn.frregs, database.config.bits() // 8])):
-                results.append((off - sum([fn.frsize, fn.frregs]), content.get('__name__', None), size))
-            return results
+            base = fn.frsize + fn.frregs
+            return [(off - base, content.get('__name__', None), size) for off, size, content in structure.fragment(fr.id, fn.frsize, fn.frregs + database.config.bits() // 8)]
 
         @utils.multicase()
         @classmethod
@@ -2816,47 +2863,25 @@ get_spdelta = spdelta = utils.alias(frame.delta, 'frame')
 
 ## instruction iteration/searching
 ## tagging
-@utils.multicase()
-def tag():
-    '''Returns all the tags defined for the current function.'''
-    return tag(ui.current.address())
-@utils.multicase(key=six.string_types)
-@utils.string.decorate_arguments('key')
-def tag(key):
-    '''Returns the value of the tag identified by `key` for the current function.'''
-    return tag(ui.current.address(), key)
-@utils.multicase(key=six.string_types)
-@utils.string.decorate_arguments('key', 'value')
-def tag(key, value):
-    '''Sets the value for the tag `key` to `value` for the current function.'''
-    return tag(ui.current.address(), key, value)
-@utils.multicase(key=six.string_types)
-@utils.string.decorate_arguments('key')
-def tag(func, key):
-    '''Returns the value of the tag identified by `key` for the function `func`.'''
-    res = tag(func)
-    if key in res:
-        return res[key]
-    raise E.MissingFunctionTagError(u"{:s}.tag({:s}, {!r}) : Unable to read the specified tag (\"{:s}\") from the function.".format(__name__, ("{:#x}" if isinstance(func, six.integer_types) else "{!r}").format(func), key, utils.string.escape(key, '"')))
-@utils.multicase()
-def tag(func):
-    '''Returns all the tags defined for the function `func`.'''
-    MANGLED_CODE, MANGLED_DATA, MANGLED_UNKNOWN = getattr(idaapi, 'MANGLED_CODE', 0), getattr(idaapi, 'MANGLED_DATA', 1), getattr(idaapi, 'MANGLED_UNKNOWN', 2)
-    Fmangled_type = idaapi.get_mangled_name_type if hasattr(idaapi, 'get_mangled_name_type') else utils.fcompose(utils.frpartial(idaapi.demangle_name, 0), utils.fcondition(operator.truth)(0, MANGLED_UNKNOWN))
-    MNG_NODEFINIT, MNG_NOPTRTYP, MNG_LONG_FORM = getattr(idaapi, 'MNG_NODEFINIT', 8), getattr(idaapi, 'MNG_NOPTRTYP', 7), getattr(idaapi, 'MNG_LONG_FORM', 0x6400007)
+_MISSING = object()     # sentinel for distinguishing a missing tag from its value
+
+def __explicit_tags__(func):
+    """Return the function and the tags that were explicitly written to the comments of the function `func`.
 
+    If `func` is not a function or is a runtime-linked address, then `None` is returned with the database tags for it.
+    """
     try:
         rt, ea = interface.addressOfRuntimeOrStatic(func)
 
     # If the given location was not within a function, then fall back to a database tag.
     except E.FunctionNotFoundError:
         logging.warning(u"{:s}.tag({:s}) : Attempted to read any tags from a non-function. Falling back to using database tags.".format(__name__, ("{:#x}" if isinstance(func, six.integer_types) else "{!r}").format(func)))
-        return database.tag(func)
+        return None, database.tag(func)
 
     # If we were given a runtime function, then the address actually uses a database tag.
     if rt:
         logging.warning(u"{:s}.tag({:#x}) : Attempted to read any tags from a runtime-linked address. Falling back to using database tags.".format(__name__, ea))
-        return database.tag(ea)
+        return None, database.tag(ea)
 
     # Read both repeatable and non-repeatable comments from the address, and
     # decode the tags that are stored within to a dictionary.
@@ -2868,23 +2893,68 @@ def tag(func):
 
     # Detect if the address had content in both repeatable or non-repeatable
     # comments so we can warn the user about what we're going to do.
-    if six.viewkeys(d1) & six.viewkeys(d2):
-        logging.info(u"{:s}.tag({:#x}) : Contents of both the repeatable and non-repeatable comment conflict with one another due to using the same keys ({!r}). Giving the {:s} comment priority.".format(__name__, ea, ', '.join(six.viewkeys(d1) & six.viewkeys(d2)), 'repeatable' if repeatable else 'non-repeatable'))
+    conflicts = six.viewkeys(d1) & six.viewkeys(d2)
+    if conflicts:
+        logging.info(u"{:s}.tag({:#x}) : Contents of both the repeatable and non-repeatable comment conflict with one another due to using the same keys ({!r}). Giving the {:s} comment priority.".format(__name__, ea, ', '.join(conflicts), 'repeatable' if repeatable else 'non-repeatable'))
 
     # Then we can store them into a dictionary whilst preserving priority.
     res = {}
     [ res.update(d) for d in ([d1, d2] if repeatable else [d2, d1]) ]
+    return fn, res
+
+@utils.multicase()
+def tag():
+    '''Returns all the tags defined for the current function.'''
+    return tag(ui.current.address())
+@utils.multicase(key=six.string_types)
+@utils.string.decorate_arguments('key')
+def tag(key):
+    '''Returns the value of the tag identified by `key` for the current function.'''
+    return tag(ui.current.address(), key)
+@utils.multicase(key=six.string_types)
+@utils.string.decorate_arguments('key', 'value')
+def tag(key, value):
+    '''Sets the value for the tag `key` to `value` for the current function.'''
+    return tag(ui.current.address(), key, value)
+@utils.multicase(key=six.string_types)
+@utils.string.decorate_arguments('key')
+def tag(func, key):
+    '''Returns the value of the tag identified by `key` for the function `func`.'''
 
-    # Collect all of the naming information for the function.
-    fname, mangled = name(ea), utils.string.of(idaapi.get_func_name(ea))
-    if fname and Fmangled_type(utils.string.to(mangled)) != MANGLED_UNKNOWN:
-        realname = utils.string.of(idaapi.demangle_name(utils.string.to(mangled), MNG_NODEFINIT|MNG_NOPTRTYP) or fname)
+    # If the key is one of the implicit tags, then we need all of the tags for the
+    # function. Otherwise we only need the ones that were written to its comments.
+    _, res = (None, tag(func)) if key in {'__name__', '__color__', '__typeinfo__'} else __explicit_tags__(func)
+    value = res.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+    raise E.MissingFunctionTagError(u"{:s}.tag({:s}, {!r}) : Unable to read the specified tag (\"{:s}\") from the function.".format(__name__, ("{:#x}" if isinstance(func, six.integer_types) else "{!r}").format(func), key, utils.string.escape(key, '"')))
+@utils.multicase()
+def tag(func):
+    '''Returns all the tags defined for the function `func`.'''
+    MANGLED_CODE, MANGLED_DATA, MANGLED_UNKNOWN = getattr(idaapi, 'MANGLED_CODE', 0), getattr(idaapi, 'MANGLED_DATA', 1), getattr(idaapi, 'MANGLED_UNKNOWN', 2)
+    Fmangled_type = idaapi.get_mangled_name_type if hasattr(idaapi, 'get_mangled_name_type') else utils.fcompose(utils.frpartial(idaapi.demangle_name, 0), utils.fcondition(operator.truth)(0, MANGLED_UNKNOWN))
+    MNG_NODEFINIT, MNG_NOPTRTYP, MNG_LONG_FORM = getattr(idaapi, 'MNG_NODEFINIT', 8), getattr(idaapi, 'MNG_NOPTRTYP', 7), getattr(idaapi, 'MNG_LONG_FORM', 0x6400007)
+
+    # Start out with the tags that were explicitly written to the function. If
+    # we didn't get a function back, then these were the database tags for it.
+    fn, res = __explicit_tags__(func)
+    if fn is None:
+        return res
+    ea = interface.range.start(fn)
+
+    # Collect all of the naming information for the function. We only need the
+    # mangled name if the function is named, and we keep it in the format that
+    # IDA gave it to us so that it can be handed straight back to the demangler.
+    fname = name(ea)
+    mangled = idaapi.get_func_name(ea) if fname else None
+    if mangled and Fmangled_type(mangled) != MANGLED_UNKNOWN:
+        realname = utils.string.of(idaapi.demangle_name(mangled, MNG_NODEFINIT|MNG_NOPTRTYP) or fname)
     else:
         realname = fname or ''
 
     # Add any of the implicit tags for the given function into our results.
     fname = fname
-    if fname and database.type.flags(interface.range.start(fn), idaapi.FF_NAME): res.setdefault('__name__', realname)
+    if fname and database.type.flags(ea, idaapi.FF_NAME): res.setdefault('__name__', realname)
     fcolor = color(fn)
     if fcolor is not None: res.setdefault('__color__', fcolor)
 
@@ -2896,9 +2966,7 @@ def tag(func):
             ti = type(fn)
 
             # Filter the name we're going to render with so that it can be parsed properly.
-            valid = {item for item in string.digits} | {':'}
-            filtered = str().join(item if item in valid or idaapi.is_valid_typename(utils.string.to(item)) else '_' for item in realname)
-            validname = ''.join(filtered)
+            validname = internal.declaration.typename(realname)
 
             # Use the validname to render the type into a string so that we
             # can return it to the user in its proper format.
@@ -2979,7 +3047,7 @@ def tag(func, key, value):
     # If there wasn't a key in any of the dictionaries we decoded, then
     # we know one was added and so we need to update the tagcache.
     if res is None:
-        internal.comment.globals.inc(interface.range.start(fn), key)
+        internal.comment.globals.inc(ea, key)
 
     # return what we fetched from the dict
     return res
@@ -3028,9 +3096,9 @@ def tag(func, key, none):
 
     # If the user's key was not in any of the decoded dictionaries, then raise
     # an exception because the key doesn't exist within the function's tags.
-    if key not in state:
-        raise E.MissingFunctionTagError(u"{:s}.tag({:#x}, {!r}, {!s}) : Unable to remove non-existent tag (\"{:s}\") from function.".format(__name__, interface.range.start(fn), key, none, utils.string.escape(key, '"')))
-    res = state.pop(key)
+    res = state.pop(key, _MISSING)
+    if res is _MISSING:
+        raise E.MissingFunctionTagError(u"{:s}.tag({:#x}, {!r}, {!s}) : Unable to remove non-existent tag (\"{:s}\") from function.".format(__name__, ea, key, none, utils.string.escape(key, '"')))
 
     # Before modifying the comment, we first need to guard its modification
     # so that the hooks don't also tamper with the reference count in the cache.
@@ -3053,7 +3121,7 @@ def tag(func, key, none):
 
     # If we got here cleanly without an exception, then the tag was successfully
     # removed and we just need to update the tag cache with its removal.
-    internal.comment.globals.dec(interface.range.start(fn), key)
+    internal.comment.globals.dec(ea, key)
     return res
 
 @utils.multicase()
@@ -3063,19 +3131,27 @@ def tags():
 @utils.multicase(ea=six.integer_types)
 def tags(ea):
     '''Returns all of the content tags for the function at the address `ea`.'''
-    fn, owners = by(ea), {item for item in chunk.owners(ea)}
+    fn, iterable = by(ea), chunk.owners(ea)
+    start = interface.range.start(fn)
+
+    # Peek at the first two owners so that we can avoid collecting them into a
+    # set when the chunk only has a single owner (which is the common case).
+    item, other = builtins.next(iterable, None), builtins.next(iterable, None)
+    owners = {item} if other is None else {item, other} | {owner for owner in iterable}
 
     # If we have multiple owners, then consolidate all of their tags into a set.
     if len(owners) > 1:
         logging.warning(u"{:s}.tags({:#x}) : Returning all of the tags for the functions owning the given address ({:#x}) as it is owned by multiple functions ({:s}).".format(__name__, ea, ea, ', '.join(map("{:#x}".format, owners))))
-        return {item for item in itertools.chain(*map(tags, owners))}
+        return builtins.set().union(*map(tags, owners))
 
-    # If we have only one owner, then we just need to point ourselves at it.
-    item, = owners
+    # If there weren't any owners, then there's no function for us to use.
+    elif item is None:
+        raise E.FunctionNotFoundError(u"{:s}.tags({:#x}) : Unable to find a function that owns the chunk at the given address ({:#x}).".format(__name__, ea, ea))
 
-    # Although if the chunk address wasn't in the owner list, then warn the user that we fixed it.
-    if interface.range.start(fn) not in owners:
-        logging.warning(u"{:s}.tags({:#x}) : Returning the tags for the function at address ({:#x}) as the chunk address ({:#x}) is not referencing a function ({:s}).".format(__name__, ea, item, interface.range.start(fn), ', '.join(map("{:#x}".format, owners))))
+    # If we have only one owner, then we just need to point ourselves at it. Although
+    # if the chunk address wasn't in the owner list, then warn the user that we fixed it.
+    if start != item:
+        logging.warning(u"{:s}.tags({:#x}) : Returning the tags for the function at address ({:#x}) as the chunk address ({:#x}) is not referencing a function ({:s}).".format(__name__, ea, item, start, ', '.join(map("{:#x}".format, owners))))
     return internal.comment.contents.name(item, target=item)
 @utils.multicase()
 def tags(func):
@@ -3119,12 +3195,12 @@ def select(func, **boolean):
     If `Or` contains an iterable then include any other tags that are specified.
     """
     target = by(func)
-    containers = (builtins.tuple, builtins.set, builtins.list)
+    start, containers = interface.range.start(target), (builtins.tuple, builtins.set, builtins.list)
     boolean = {key : {item for item in value} if isinstance(value, containers) else {value} for key, value in boolean.items()}
 
     # If nothing specific was queried, then yield all tags that are available.
     if not boolean:
-        for ea in sorted(internal.comment.contents.address(interface.range.start(target), target=interface.range.start(target))):
+        for ea in sorted(internal.comment.contents.address(start, target=start)):
             ui.navigation.analyze(ea)
             address = database.tag(ea)
             if address: yield ea, address
@@ -3134,7 +3210,7 @@ def select(func, **boolean):
     Or, And = ({item for item in boolean.get(B, [])} for B in ['Or', 'And'])
 
     # Walk through every tagged address and cross-check it against the query.
-    for ea in sorted(internal.comment.contents.address(interface.range.start(target), target=interface.range.start(target))):
+    for ea in sorted(internal.comment.contents.address(start, target=start)):
         ui.navigation.analyze(ea)
         collected, address = {}, database.tag(ea)
 
@@ -3143,7 +3219,7 @@ def select(func, **boolean):
 
         # And(&) includes tags only if the address includes all of the specified tagnames.
         if And:
-            if And & six.viewkeys(address) == And:
+            if And <= six.viewkeys(address):
                 collected.update({key : value for key, value in address.items() if key in And})
             else: continue
 
@@ -3202,15 +3278,20 @@ class type(object):
         '''Return the type information for the function `func` as an ``idaapi.tinfo_t``.'''
         _, ea = interface.addressOfRuntimeOrStatic(func)
 
-        # Guess the type information for the function ahead of time because
-        # they should _always_ have type information associated with them.
+        # If we can find a proper typeinfo then use that as-is. This way we
+        # only need to guess the type when one couldn't be found.
+        res = database.type(ea)
+        if res:
+            return res
+
+        # Guess the type information for the function because they should
+        # _always_ have type information associated with them.
         ti = idaapi.tinfo_t()
-        if idaapi.GUESS_FUNC_FAILED == idaapi.guess_tinfo2(ea, ti) if idaapi.__version__ < 7.0 else idaapi.guess_tinfo(ti, ea):
+        if idaapi.GUESS_FUNC_FAILED == _guess_tinfo(ti, ea):
             logging.debug(u"{:s}({:#x}) : Ignoring failure ({:d}) when trying to guess the `{:s}` for the specified function.".format('.'.join([__name__, cls.__name__]), ea, idaapi.GUESS_FUNC_FAILED, ti.__class__.__name__))
 
-        # If we can find a proper typeinfo then use that, otherwise return
-        # whatever it was that was guessed.
-        return database.type(ea) or ti
+        # Return whatever it was that was guessed.
+        return ti
     @utils.multicase(info=idaapi.tinfo_t)
     def __new__(cls, func, info, **guessed):
         '''Apply the ``idaapi.tinfo_t`` in `info` to the function `func`.'''
@@ -3237,6 +3318,10 @@ class type(object):
                 raise E.DisassemblerError("{:s}({:#x}, {!r}) : Unable to promote type to a pointer due to being applied to a function pointer.".format('.'.join([__name__, cls.__name__]), ea, "{!s}".format(info)))
             logging.warning("{:s}({:#x}, {!r}) : Promoting type ({!r}) to a function pointer ({!r}) due to the address ({:#x}) being runtime-linked.".format('.'.join([__name__, cls.__name__]), ea, "{!s}".format(info), "{!s}".format(info), "{!s}".format(ti), ea))
 
+        # If it's already a function pointer, then it can also be used as-is.
+        else:
+            ti = info
+
         # and then we just need to apply the type to the given address.
         result, ok = cls(ea), idaapi.apply_tinfo(ea, ti, TINFO_DEFINITE)
         if not ok:
@@ -3254,18 +3339,10 @@ class type(object):
         MANGLED_CODE, MANGLED_DATA, MANGLED_UNKNOWN = getattr(idaapi, 'MANGLED_CODE', 0), getattr(idaapi, 'MANGLED_DATA', 1), getattr(idaapi, 'MANGLED_UNKNOWN', 2)
         Fmangled_type = idaapi.get_mangled_name_type if hasattr(idaapi, 'get_mangled_name_type') else utils.fcompose(utils.frpartial(idaapi.demangle_name, 0), utils.fcondition(operator.truth)(0, MANGLED_UNKNOWN))
         MNG_NODEFINIT, MNG_NOPTRTYP, MNG_LONG_FORM = getattr(idaapi, 'MNG_NODEFINIT', 8), getattr(idaapi, 'MNG_NOPTRTYP', 7), getattr(idaapi, 'MNG_LONG_FORM', 0x6400007)
-        til = idaapi.cvar.idati if idaapi.__version__ < 7.0 else idaapi.get_idati()
 
-        # Figure out what we're actually going to be applying the type information to,
-        # and figure out what its real name is so that we can mangle it if necessary.
+        # Figure out what we're actually going to be applying the type information to.
         rt, ea = interface.addressOfRuntimeOrStatic(func)
 
-        fname, mangled = name(ea), database.name(ea) if rt else utils.string.of(idaapi.get_func_name(ea))
-        if fname and Fmangled_type(utils.string.to(mangled)) != MANGLED_UNKNOWN:
-            realname = utils.string.of(idaapi.demangle_name(utils.string.to(mangled), MNG_NODEFINIT|MNG_NOPTRTYP) or fname)
-        else:
-            realname = fname
-
         # Now we can parse it and see what we have. If we couldn't parse it or it
         # wasn't an actual function of any sort, then we need to bail.
         ti = internal.declaration.parse(info)
@@ -3277,22 +3354,35 @@ class type(object):
 
         # Otherwise, te type is valid and we only need to figure out if it needs
         # to be promoted to a pointer or not.
-        if rt and not ti.is_funcptr():
+        promoted = rt and not ti.is_funcptr()
+        if promoted:
             pi = idaapi.ptr_type_data_t()
             pi.obj_type = ti
             ti = idaapi.tinfo_t()
             if not ti.create_ptr(pi):
                 raise E.DisassemblerError("{:s}({:#x}, {!r}) : Unable to promote type to a pointer due to being applied to a function pointer.".format('.'.join([__name__, cls.__name__]), ea, info))
-
-            # Now we re-render it into a string so that it can be applied.
             logging.warning("{:s}({:#x}, {!r}) : Promoting type ({!r}) to a function pointer ({!r}) due to the address ({:#x}) being runtime-linked.".format('.'.join([__name__, cls.__name__]), ea, info, info, "{!s}".format(ti), ea))
-            info = idaapi.print_tinfo('', 0, 0, 0, ti, utils.string.to(realname), '')
 
-        # Terminate the typeinfo string with a ';' so that IDA can parse it.
-        terminated = info if info.endswith(';') else "{:s};".format(info)
+        # First try to apply the type that we parsed directly to the function rather
+        # than rendering it back into a declaration for IDA to parse all over again.
+        result, ok = cls(ea), idaapi.apply_tinfo(ea, ti, TINFO_DEFINITE)
+
+        # If that didn't work, then fall back to having IDA parse the declaration. If
+        # we promoted the type, then we need to re-render it with the real name of
+        # the function so that it can be applied.
+        if not ok:
+            if promoted:
+                fname, mangled = name(ea), database.name(ea) if rt else utils.string.of(idaapi.get_func_name(ea))
+                if fname and Fmangled_type(utils.string.to(mangled)) != MANGLED_UNKNOWN:
+                    realname = utils.string.of(idaapi.demangle_name(utils.string.to(mangled), MNG_NODEFINIT|MNG_NOPTRTYP) or fname)
+                else:
+                    realname = fname
+                info = idaapi.print_tinfo('', 0, 0, 0, ti, utils.string.to(realname), '')
+
+            # Terminate the typeinfo string with a ';' so that IDA can parse it.
+            terminated = info if info.endswith(';') else "{:s};".format(info)
+            ok = idaapi.apply_cdecl(_get_idati(), ea, terminated, TINFO_DEFINITE)
 
-        # Now we should just be able to apply it to the function.
-        result, ok = cls(ea), idaapi.apply_cdecl(til, ea, terminated, TINFO_DEFINITE)
         if not ok:
             raise E.InvalidTypeOrValueError(u"{:s}.info({:#x}) : Unable to apply the specified type declaration (\"{!s}\").".format('.'.join([__name__, cls.__name__]), ea, utils.string.escape(info, '"')))
 
@@ -3441,7 +3531,8 @@ class type(object):
     @classmethod
     def has_frameptr(cls, func):
         '''Return if the function `func` uses a frame pointer (register).'''
-        return True if cls.flags(func, idaapi.FUNC_FRAME) else False
+        fn = by(func)
+        return True if fn.flags & idaapi.FUNC_FRAME else False
     frameptr = frameptrQ = utils.alias(has_frameptr, 'type')
 
     @utils.multicase()
@@ -3481,7 +3572,8 @@ class type(object):
     @classmethod
     def is_library(cls, func):
         '''Return a boolean describing whether the function `func` is considered a library function.'''
-        return True if cls.flags(func, idaapi.FUNC_LIB) else False
+        fn = by(func)
+        return True if fn.flags & idaapi.FUNC_LIB else False
     libraryQ = utils.alias(is_library, 'type')
 
     @utils.multicase()
@@ -3509,7 +3601,8 @@ class type(object):
     @classmethod
     def is_thunk(cls, func):
         '''Return a boolean describing whether the function `func` was determined to be a code thunk.'''
-        return True if cls.flags(func, idaapi.FUNC_THUNK) else False
+        fn = by(func)
+        return True if fn.flags & idaapi.FUNC_THUNK else False
     thunkQ = utils.alias(is_thunk, 'type')
 
     @utils.multicase()
@@ -3537,7 +3630,8 @@ class type(object):
     @classmethod
     def is_far(cls, func):
         '''Return a boolean describing whether the function `func` is considered a "far" function by IDA or the user.'''
-        return True if cls.flags(func, idaapi.FUNC_FAR | idaapi.FUNC_USERFAR) else False
+        fn = by(func)
+        return True if fn.flags & (idaapi.FUNC_FAR | idaapi.FUNC_USERFAR) else False
     far = farQ = utils.alias(is_far, 'type')
 
     @utils.multicase()
@@ -3550,7 +3644,8 @@ class type(object):
     def is_static(cls, func):
         '''Return a boolean describing whether the function `func` is defined as a static function.'''
         FUNC_STATICDEF = idaapi.FUNC_STATICDEF if hasattr(idaapi, 'FUNC_STATICDEF') else idaapi.FUNC_STATIC
-        return True if cls.flags(func, FUNC_STATICDEF) else False
+        fn = by(func)
+        return True if fn.flags & FUNC_STATICDEF else False
     staticQ = utils.alias(is_static, 'type')
 
     @utils.multicase()
@@ -3579,7 +3674,8 @@ class type(object):
     @classmethod
     def is_hidden(cls, func):
         '''Return a boolean describing whether the function `func` is hidden.'''
-        return True if cls.flags(func, idaapi.FUNC_HIDDEN) else False
+        fn = by(func)
+        return True if fn.flags & idaapi.FUNC_HIDDEN else False
     hiddenQ = utils.alias(is_hidden, 'type')
 
     @utils.multicase()
@@ -3624,7 +3720,6 @@ class type(object):
 
         The integer returned corresponds to one of the ``idaapi.CM_CC_*`` constants.
         """
-        get_tinfo = (lambda ti, ea: idaapi.get_tinfo2(ea, ti)) if idaapi.__version__ < 7.0 else idaapi.get_tinfo
         try:
             _, ea = interface.addressOfRuntimeOrStatic(func)
 
@@ -3636,7 +3731,7 @@ class type(object):
         # Grab the type information from the address that we resolved. We avoid
         # doing any "guessing" here and only work with an explicitly applied type.
         ti = idaapi.tinfo_t()
-        if not get_tinfo(ti, ea):
+        if not _get_tinfo(ti, ea):
             raise E.MissingTypeOrAttribute(u"{:s}.convention({:#x}) : Specified function {:#x} does not contain a prototype declaration.".format('.'.join([__name__, cls.__name__]), ea, ea))
 
         # Now we can just grab the function details for this type, use it to extract
@@ -3648,26 +3743,14 @@ class type(object):
     @classmethod
     def convention(cls, func, convention):
         '''Set the calling convention used by the prototype for the function `func` to the specified `convention` string.'''
-        cclookup = {
-            '__cdecl': idaapi.CM_CC_CDECL,
-            '__stdcall': idaapi.CM_CC_STDCALL,
-            '__pascal': idaapi.CM_CC_PASCAL,
-            '__fastcall': idaapi.CM_CC_FASTCALL,
-            '__thiscall': idaapi.CM_CC_THISCALL,
-        }
-
-        # Try to normalize the string so that it will match an entry in our table.
-        noncommonsuffix = {item for item in cclookup if not item.endswith('call')}
-        prefixed = convention.lower() if convention.startswith('__') else "__{:s}".format(convention).lower()
-        string = prefixed if operator.contains(noncommonsuffix, prefixed) or prefixed.endswith('call') else "{:s}call".format(prefixed)
-
         # FIXME: we should probably use globs, or something more intelligent
         #        to figure out what convention the user is trying apply.
 
-        # Verify that the string can be found in our lookup table, and then use it to grab our cc.
-        if not operator.contains(cclookup, string):
-            raise E.ItemNotFoundError(u"{:s}.convention({!r}, {!r}) : The convention that was specified ({!r}) is not of the known types ({:s}).".format('.'.join([__name__, cls.__name__]), func, convention, string, ', '.join(cclookup)))
-        cc = cclookup[string]
+        # Verify that the string can be found in our normalized lookup table, and then use it to grab our cc.
+        string = convention.lower()
+        if not operator.contains(_cclookup_normalized, string):
+            raise E.ItemNotFoundError(u"{:s}.convention({!r}, {!r}) : The convention that was specified ({!r}) is not of the known types ({:s}).".format('.'.join([__name__, cls.__name__]), func, convention, string, ', '.join(_cclookup)))
+        cc = _cclookup_normalized[string]
 
         # Now we have the calling convention integer that we can use.
         return cls.convention(func, cc)
@@ -3676,11 +3759,10 @@ class type(object):
     def convention(cls, func, convention):
         '''Set the calling convention used by the prototype for the function `func` to the specified `convention`.'''
         _, ea = interface.addressOfRuntimeOrStatic(func)
-        get_tinfo = (lambda ti, ea: idaapi.get_tinfo2(ea, ti)) if idaapi.__version__ < 7.0 else idaapi.get_tinfo
 
         # Grab the type information from the resolved address.
         ti = idaapi.tinfo_t()
-        if not get_tinfo(ti, ea):
+        if not _get_tinfo(ti, ea):
             raise E.MissingTypeOrAttribute(u"{:s}.convention({:#x}, {:#x}) : The specified function ({:#x}) does not contain a prototype declaration.".format('.'.join([__name__, cls.__name__]), ea, convention, ea))
 
         # Now we just need to create the strpath.update_function_details
@@ -3756,11 +3838,10 @@ class type(object):
         def __new__(cls, func, info):
             '''Modify the result type for the function `func` to the type information provided as an ``idaapi.tinfo_t`` in `info`.'''
             _, ea = interface.addressOfRuntimeOrStatic(func)
-            get_tinfo = (lambda ti, ea: idaapi.get_tinfo2(ea, ti)) if idaapi.__version__ < 7.0 else idaapi.get_tinfo
 
             # Grab the type information from the function that we'll update with.
             ti = idaapi.tinfo_t()
-            if not get_tinfo(ti, ea):
+            if not _get_tinfo(ti, ea):
                 raise E.MissingTypeOrAttribute(u"{:s}.result({:#x}, {!r}) : Specified function {:#x} does not contain a prototype declaration.".format('.'.join([__name__, cls.__name__]), ea, "{!s}".format(info), ea))
 
             # Now we can create an updater, and grab the details out of it.
@@ -3946,12 +4027,19 @@ class type(object):
         def storage(cls, func, index):
             '''Return the storage location of the parameter at the specified `index` in the function `func`.'''
             _, ea = internal.interface.addressOfRuntimeOrStatic(func)
-            locations = [item for _, _, item in type.arguments.iterate(func)]
+            _, ftd = interface.tinfo.function_details(ea, type(ea))
 
             # As always, check our bounds and raise an exception...cleanly.
-            if not (0 <= index < len(locations)):
-                raise E.InvalidTypeOrValueError(u"{:s}.storage({:#x}, {:d}) : The provided index ({:d}) is not within the range of the number of arguments ({:d}) for the specified function ({:#x}).".format('.'.join([__name__, 'type', cls.__name__]), ea, index, index, len(locations), ea))
-            location = locations[index]
+            if not (0 <= index < ftd.size()):
+                raise E.InvalidTypeOrValueError(u"{:s}.storage({:#x}, {:d}) : The provided index ({:d}) is not within the range of the number of arguments ({:d}) for the specified function ({:#x}).".format('.'.join([__name__, 'type', cls.__name__]), ea, index, index, ftd.size(), ea))
+
+            # Now we only need to process the location of the requested parameter.
+            farg = ftd[index]
+            ltype, linfo = interface.tinfo.location_raw(farg.argloc)
+            location = interface.tinfo.location(farg.type.get_size(), instruction.architecture, ltype, linfo)
+            if location is linfo:
+                ltype_s = interface.tinfo.location_names.get(ltype, '')
+                logging.warning(u"{:s}.storage({:#x}, {:d}) : Unable to handle the unsupported type {:s}({:#x}) for the argument at the specified index.".format('.'.join([__name__, 'type', cls.__name__]), ea, index, ltype_s, ltype))
 
             # Otherwise, this might be a tuple and we return the whole thing
             # unless its a (register, offset). If it is, then check that it's
@@ -4034,8 +4122,7 @@ class type(object):
             # Use the address and type to snag the details requested by the
             # caller, iterate through it, and then return each type as a list.
             _, ftd = interface.tinfo.function_details(ea, ti)
-            iterable = (ftd[index] for index in builtins.range(ftd.size()))
-            return [item.type for item in iterable]
+            return [ftd[index].type for index in builtins.range(ftd.size())]
         @utils.multicase(types=(builtins.list, builtins.tuple))
         def __new__(cls, func, types):
             '''Overwrite the type information for the parameters belonging to the function `func` with the provided list of `types`.'''
@@ -4056,7 +4143,8 @@ class type(object):
             ftd.resize(len(types))
             for index, item in enumerate(types):
                 aname, ainfo = item if isinstance(item, builtins.tuple) else ('', item)
-                ftd[index].name, ftd[index].type = utils.string.to(aname), internal.declaration.parse(ainfo) if isinstance(ainfo, six.string_types) else ainfo
+                farg = ftd[index]
+                farg.name, farg.type = utils.string.to(aname), internal.declaration.parse(ainfo) if isinstance(ainfo, six.string_types) else ainfo
             updater.send(ftd), updater.close()
 
             # The very last thing we need to do is to return our results. Even though we collected
@@ -4105,8 +4193,7 @@ class type(object):
             ti, ftd = interface.tinfo.function_details(ea, type(ea))
 
             # Iterate through the function details and return each name as a list.
-            iterable = (ftd[index] for index in builtins.range(ftd.size()))
-            return [utils.string.to(item.name) for item in iterable]
+            return [utils.string.to(ftd[index].name) for index in builtins.range(ftd.size())]
         @utils.multicase(names=(builtins.list, builtins.tuple))
         @classmethod
         def names(cls, func, names):
@@ -4130,7 +4217,7 @@ class type(object):
             for index in builtins.range(ftd.size()):
                 farg, item = ftd[index], strings[index] if index < len(strings) else ''
                 results.append(utils.string.of(farg.name))
-                ftd[index].name = utils.string.to(item)
+                farg.name = utils.string.to(item)
 
             # That was it, just need to update everything and return our results.
             updater.send(ftd), updater.close()
@@ -4152,25 +4239,20 @@ class type(object):
             # This should be easy, as we only need to grab the details from the type.
             _, ftd = interface.tinfo.function_details(ea, ti)
 
-            # Then we can just iterate through them and grab their raw values.
-            items = []
+            # Then we can just iterate through them, grab their raw values, process
+            # them, and then yield each individual item to the caller. The raw
+            # location is copied out of each argloc_t before we process it.
+            architecture = instruction.architecture
             for index in builtins.range(ftd.size()):
-                loc, name, ti = ftd[index].argloc, ftd[index].name, ftd[index].type
-                locinfo = interface.tinfo.location_raw(loc)
-                items.append((utils.string.of(name), ti, locinfo))
-
-            # Now we can iterate through each of these items safely, process them,
-            # and then yield each individual item to the caller.
-            for index, item in enumerate(items):
-                name, ti, storage = item
-                ltype, linfo = storage
-                result = interface.tinfo.location(ti.get_size(), instruction.architecture, ltype, linfo)
+                farg = ftd[index]
+                name, ti = utils.string.of(farg.name), farg.type
+                ltype, linfo = interface.tinfo.location_raw(farg.argloc)
+                result = interface.tinfo.location(ti.get_size(), architecture, ltype, linfo)
 
                 # Check to see if we got an error. We do this with a hack, by
                 # doing an identity check on what was returned.
                 if result is linfo:
-                    ltype_table = {getattr(idaapi, attribute) : attribute for attribute in dir(idaapi) if attribute.startswith('ALOC_')}
-                    ltype_s = ltype_table.get(ltype, '')
+                    ltype_s = interface.tinfo.location_names.get(ltype, '')
                     logging.warning(u"{:s}.iterate({:#x}) : Unable to handle the unsupported type {:s}({:#x}) for argument at index {:d}{:s}{:s}.".format('.'.join([__name__, cls.__name__]), ea, ltype_s, ltype, index, " with the name \"{:s}\"".format(utils.string.escape(name, '"')) if name else '', " of the type {!s}".format(ti) if ti.is_well_defined() else ''))
 
                 # Now we can yield our result that we determined for each parameter.
@@ -4188,10 +4270,12 @@ class type(object):
             '''Return the registers for each of the parameters belonging to the function `func`.'''
             result = []
             for _, _, loc in cls.iterate(func):
-                if isinstance(loc, builtins.tuple) and any(isinstance(item, interface.register_t) for item in loc):
+
+                # a register with an offset is returned as a tuple, and we only
+                # need to keep its offset if it is actually being used.
+                if isinstance(loc, builtins.tuple) and len(loc) == 2 and isinstance(loc[0], interface.register_t):
                     reg, offset = loc
-                    item = loc if all(isinstance(item, interface.register_t) for item in loc) else loc if offset else reg
-                    result.append(item)
+                    result.append(loc if offset else reg)
                 continue
             return result
         regs = utils.alias(registers, 'type.arguments')
@@ -4205,7 +4289,6 @@ class type(object):
         @classmethod
         def storage(cls, func):
             '''Return the storage locations for each of the parameters belonging to the function `func`.'''
-            iterable = (location for _, _, location in cls.iterate(func))
             result = []
             for _, _, item in cls.iterate(func):
                 if isinstance(item, builtins.tuple) and isinstance(item[1], six.integer_types):
@@ -4241,7 +4324,8 @@ class type(object):
             # Convert all our parameters and update the index we allocated space for.
             res = name if isinstance(name, tuple) else (name,)
             aname, ainfo = interface.tuplename(*(res + suffix)), internal.declaration.parse(info) if isinstance(info, six.string_types) else info
-            ftd[index].name, ftd[index].type = utils.string.to(aname), ainfo
+            farg = ftd[index]
+            farg.name, farg.type = utils.string.to(aname), ainfo
 
             # We should be good to go and we just need to return the index.
             updater.send(ftd), updater.close()
@@ -4260,7 +4344,7 @@ class type(object):
             if not database.xref.code_down(ea):
                 raise E.InvalidTypeOrValueError(u"{:s}.arguments({:#x}) : Unable to return any parameters as the provided address ({:#x}) {:s} code references.".format('.'.join([__name__, cls.__name__]), ea, ea, 'does not have any' if instruction.type.is_call(ea) else 'is not a call instruction with'))
             items = idaapi.get_arg_addrs(ea)
-            return [] if items is None else [ea for ea in items]
+            return [] if items is None else builtins.list(items)
         @utils.multicase(ea=six.integer_types)
         @classmethod
         def locations(cls, func, ea):
@@ -4318,7 +4402,7 @@ class xref(object):
 
         # define a closure that will get us all of the related code references so we can process them.
         def Freferences(fn):
-            branches = [instruction.is_call, instruction.is_branch]
+            start = interface.range.start(fn)
             for ea in iterate(fn):
 
                 # if it isn't code, then we skip it.
@@ -4326,23 +4410,24 @@ class xref(object):
                     continue
 
                 # if it's a branching or call-type instruction that has no xrefs, then log a warning for the user.
-                elif not len(database.xref.down(ea)) and any(F(ea) for F in branches):
-                    logging.warning(u"{:s}.down({:#x}) : Discovered the \"{:s}\" instruction at {:#x} that might've contained a reference but was unresolved.".format('.'.join([__name__, cls.__name__]), interface.range.start(fn), utils.string.escape(database.instruction(ea), '"'), ea))
+                branching = instruction.is_call(ea) or instruction.is_branch(ea)
+                if branching and not len(database.xref.down(ea)):
+                    logging.warning(u"{:s}.down({:#x}) : Discovered the \"{:s}\" instruction at {:#x} that might've contained a reference but was unresolved.".format('.'.join([__name__, cls.__name__]), start, utils.string.escape(database.instruction(ea), '"'), ea))
                     continue
 
                 # now we need to check which code xrefs are actually going to be something we care
                 # about by checking to see if there's an xref pointing outside our function.
-                for xref in filter(database.within, database.xref.code_down(ea)):
+                for xref in [xref for xref in database.xref.code_down(ea) if database.within(xref)]:
                     if not contains(fn, xref):
                         yield ea, xref
 
                     # if it's a branching or call-type instruction, but referencing non-code, then we care about it.
-                    elif not database.type.is_code(xref) and any(F(ea) for F in branches):
+                    elif branching and not database.type.is_code(xref):
                         yield ea, xref
 
                     # if we're recursive and there's a code xref that's referencing our entrypoint,
                     # then we're going to want that too.
-                    elif interface.range.start(fn) == xref:
+                    elif start == xref:
                         yield ea, xref
                     continue
 
@@ -4353,8 +4438,9 @@ class xref(object):
 
                 # last thing we need to determine is which data xrefs are relevant
                 # which only includes things that reference code outside of us.
-                for xref in filter(database.within, database.xref.data_down(ea)):
-                    if database.type.is_code(xref) and not contains(fn, xref):
+                for xref in [xref for xref in database.xref.data_down(ea) if database.within(xref)]:
+                    code = database.type.is_code(xref)
+                    if code and not contains(fn, xref):
                         yield ea, xref
 
                     # if it's referencing an external, then yeah...this is definitely an xref we want.
@@ -4365,7 +4451,7 @@ class xref(object):
 
                     # otherwise if it's a branch, but not referencing any code
                     # then this is probably a global containing a code pointer.
-                    elif not database.type.is_code(xref) and any(F(ea) for F in branches):
+                    elif branching and not code:
                         yield ea, xref
                     continue
                 continue
@@ -4376,12 +4462,12 @@ class xref(object):
         iterable = Freferences(fn)
 
         # now we need to figure out if we're just going to return the referenced addresses.
-        if not builtins.next((references[k] for k in ['reference', 'references', 'refs'] if k in references), False):
+        if not (references.get('reference') or references.get('references') or references.get('refs')):
             return sorted({d for _, d in iterable})
 
-        # otherwise we're being asked to return the source with its target reference for each one.
-        results = {ea : d for ea, d in iterable}
-        return [(ea, results[ea]) for ea in sorted(results)]
+        # otherwise we're being asked to return the source with its target reference for each
+        # one. we sort them by their source whilst keeping every target that it references.
+        return sorted(iterable, key=operator.itemgetter(0))
 
     @utils.multicase()
     @classmethod
@@ -4392,11 +4478,7 @@ class xref(object):
     @classmethod
     def up(cls, func):
         '''Return all of the addresses that reference the function `func`.'''
-        rt, ea = interface.addressOfRuntimeOrStatic(func)
-        # runtime
-        if rt:
-            return database.xref.up(ea)
-        # regular
+        _, ea = interface.addressOfRuntimeOrStatic(func)
         return database.xref.up(ea)
 
     @utils.multicase(index=six.integer_types)
@@ -4431,7 +4513,7 @@ class xref(object):
         if not database.xref.code_down(ea):
             raise E.InvalidTypeOrValueError(u"{:s}.arguments({:#x}) : Unable to return any parameters as the provided address ({:#x}) {:s} code references.".format('.'.join([__name__, cls.__name__]), ea, ea, 'does not have any' if instruction.type.is_call(ea) else 'is not a call instruction with'))
         items = idaapi.get_arg_addrs(ea)
-        return [] if items is None else [ea for ea in items]
+        return [] if items is None else builtins.list(items)
     @utils.multicase(ea=six.integer_types)
     @classmethod
     def arguments(cls, func, ea):
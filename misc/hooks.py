@@ -8,8 +8,8 @@ to be used by the average user.
 """
 
 import six
-import sys, logging
-import functools, operator, itertools, types
+import sys, time, logging, contextlib
+import functools, operator, itertools, types, bisect
 
 import database, function, instruction, ui
 import internal
@@ -104,6 +104,42 @@ class changingchanged(object):
     "changing" event which is dispatched before any changes are made, and the
     second part is the "changed" event which happens after they've been completed.
     """
+    class event(object):
+        """
+        This class is responsible for keeping track of a subclass' updater so
+        that when it is closed it can be removed from the states dictionary.
+        Anything that is sent to it after the updater has completed is discarded.
+        """
+        __slots__ = ('ea', 'states', 'handler')
+
+        def __init__(self, ea, states, handler):
+            self.ea, self.states, self.handler = ea, states, handler
+
+        def send(self, value):
+            handler = self.handler
+            if handler is None:
+                return
+
+            # Submit the value to our handler. If it's finished, then it
+            # should be safe to close and we can just discard it.
+            try:
+                handler.send(value)
+            except StopIteration:
+                self.handler = None
+                handler.close()
+            return
+
+        def close(self):
+            handler, self.handler = self.handler, None
+            if handler is not None:
+                handler.close()
+
+            # Now we can remove ourselves from the states dictionary, but
+            # only if we haven't already been replaced by a new state.
+            if self.states.get(self.ea) is self:
+                self.states.pop(self.ea)
+            return
+
     @classmethod
     def database_init(cls, idp_modname):
         return cls.initialize()
@@ -113,11 +149,29 @@ class changingchanged(object):
         idp_modname = idaapi.get_idp_name()
         return cls.database_init(idp_modname)
 
+    @classmethod
+    @contextlib.contextmanager
+    def disabled(cls, *names):
+        '''Disable the hooks specified by `names` (or the class hooks) for the duration of the context.'''
+        idb, hooks = ui.hook.idb, names or cls.hooks
+        for item in hooks:
+            idb.disable(item)
+
+        # Now we can yield to the caller, and then re-enable all of the
+        # hooks that were disabled once the caller is done with them.
+        try:
+            yield
+
+        finally:
+            for item in hooks:
+                idb.enable(item)
+        return
+
     @classmethod
     def is_ready(cls):
         '''This is just a utility method for determining if a database is ready or not.'''
         global State
-        return State in {state.ready}
+        return State is state.ready
 
     @classmethod
     def initialize(cls):
@@ -141,48 +195,24 @@ class changingchanged(object):
         # incomplete, then warn the user about it. This will only happen when the
         # "changing" event is called for the same address more than once without
         # the "changed" event being used to complete it.
-        if ea in states:
-            res = states.pop(ea)
+        res = states.pop(ea, None)
+        if res is not None:
             logging.info(u"{:s}.new({:#x}) : Forcefully closing the state for address {:#x} by request.".format('.'.join([__name__, cls.__name__]), ea, ea))
             res.close()
 
-        # Define a closure that is responsible for keeping track
-        # of a subclass' updater so that when it completes its
-        # execution it can be removed from our states dictionary.
-        def consumer(ea, states, handler):
-            next(handler)
-
-            # Consume our handler until it's finished. When we
-            # leave this handler it should be safe to close.
-            try:
-                while True:
-                    handler.send((yield))
-            except StopIteration:
-                pass
-            finally:
-                handler.close()
-
-            # Consume anything and discard it until we're
-            # being closed and need to perform cleanup.
-            try:
-                while True:
-                    yield
-            except GeneratorExit:
-                states.pop(ea)
-            return
-
-        # Initialize a new consumer based on the class updater method,
-        # and then set off prior to storing it in our state dictionary.
-        coroutine = consumer(ea, states, cls.updater())
-        next(coroutine)
-        return states.setdefault(ea, coroutine)
+        # Initialize a new event based on the class updater method, and then
+        # set it off prior to storing it in our state dictionary.
+        handler = cls.updater()
+        next(handler)
+        res = states[ea] = cls.event(ea, states, handler)
+        return res
 
     @classmethod
     def resume(cls, ea):
         '''This will return the currently state that is stored for a particular address.'''
-        states = cls.__states__
-        if ea in states:
-            return states[ea]
+        res = cls.__states__.get(ea, None)
+        if res is not None:
+            return res
         raise E.AddressNotFoundError(u"{:s}.resume({:#x}) : Unable to locate a currently available state for address {:#x}.".format('.'.join([__name__, cls.__name__]), ea, ea))
 
     @classmethod
@@ -197,6 +227,12 @@ class address(changingchanged):
     address. This address will either be a contents tag if it's within the boundaries
     of a function, or a globals tag if it's just some arbitrary address.
     """
+    # the hooks that need to be disabled while we're handling an event.
+    hooks = ['changing_cmt', 'cmt_changed']
+
+    # the version-specific function for fetching the flags at an address.
+    get_flags = staticmethod(idaapi.getFlags if idaapi.__version__ < 7.0 else idaapi.get_full_flags)
+
     @classmethod
     def get_func_extern(cls, ea):
         """Return the function at the given address and whether the address is a function populated by the rtld (an external).
@@ -204,53 +240,49 @@ class address(changingchanged):
         This is necessary to determine whether this is an actual function, or is really
         just an address to an import.
         """
-        get_flags = idaapi.getFlags if idaapi.__version__ < 7.0 else idaapi.get_full_flags
 
         # If there's a function defined at our address, then return True (we're an rtld)
         # if we're in an external segment, otherwise we return True if we're not pointing to data.
         f, seg = idaapi.get_func(ea), idaapi.getseg(ea)
-        return f, seg.type in {idaapi.SEG_XTRN} if f else (get_flags(ea) & idaapi.as_uint32(idaapi.MS_CLS) == idaapi.FF_DATA)
+        return f, seg.type in {idaapi.SEG_XTRN} if f else (cls.get_flags(ea) & idaapi.as_uint32(idaapi.MS_CLS) == idaapi.FF_DATA)
 
     @classmethod
-    def _update_refs(cls, ea, old, new):
-        f, rt = cls.get_func_extern(ea)
+    def _update_refs(cls, ea, extern, old, new):
+        f, rt = extern
 
-        oldkeys, newkeys = ({item for item in content.keys()} for content in [old, new])
+        oldkeys, newkeys = ({item for item in content} for content in [old, new])
         logging.debug(u"{:s}.update_refs({:#x}) : Updating old keys ({!s}) to new keys ({!s}){:s}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(oldkeys), utils.string.repr(newkeys), ' for runtime-linked function' if rt else ''))
-        for key in oldkeys ^ newkeys:
-            if key not in new:
-                logging.debug(u"{:s}.update_refs({:#x}) : Decreasing reference count for {!s} at {:s}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(key), 'address', ea))
-                if f and not rt: internal.comment.contents.dec(ea, key)
-                else: internal.comment.globals.dec(ea, key)
-            if key not in old:
-                logging.debug(u"{:s}.update_refs({:#x}) : Increasing reference count for {!s} at {:s}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(key), 'address', ea))
-                if f and not rt: internal.comment.contents.inc(ea, key)
-                else: internal.comment.globals.inc(ea, key)
-            continue
+
+        # Figure out which keys were removed and added, and then update the reference
+        # counts for each of them within the context that the address belongs to.
+        removed, added = oldkeys - newkeys, newkeys - oldkeys
+        ctx = internal.comment.contents if f and not rt else internal.comment.globals
+        if removed:
+            logging.debug(u"{:s}.update_refs({:#x}) : Decreasing reference count for {!s} at {:s} {:#x}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(removed), 'address', ea))
+            ctx.dec_many(ea, removed)
+        if added:
+            logging.debug(u"{:s}.update_refs({:#x}) : Increasing reference count for {!s} at {:s} {:#x}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(added), 'address', ea))
+            ctx.inc_many(ea, added)
         return
 
     @classmethod
-    def _create_refs(cls, ea, content):
-        f, rt = cls.get_func_extern(ea)
+    def _create_refs(cls, ea, extern, content):
+        f, rt = extern
 
-        contentkeys = {item for item in content.keys()}
+        contentkeys = {item for item in content}
         logging.debug(u"{:s}.create_refs({:#x}) : Creating keys ({!s}){:s}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(contentkeys), ' for runtime-linked function' if rt else ''))
-        for key in contentkeys:
-            logging.debug(u"{:s}.create_refs({:#x}) : Increasing reference count for {!s} at {:s} {:#x}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(key), 'address', ea))
-            if f and not rt: internal.comment.contents.inc(ea, key)
-            else: internal.comment.globals.inc(ea, key)
+        ctx = internal.comment.contents if f and not rt else internal.comment.globals
+        ctx.inc_many(ea, contentkeys)
         return
 
     @classmethod
-    def _delete_refs(cls, ea, content):
-        f, rt = cls.get_func_extern(ea)
+    def _delete_refs(cls, ea, extern, content):
+        f, rt = extern
 
-        contentkeys = {item for item in content.keys()}
+        contentkeys = {item for item in content}
         logging.debug(u"{:s}.delete_refs({:#x}) : Deleting keys ({!s}){:s}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(contentkeys), ' from runtime-linked function' if rt else ''))
-        for key in contentkeys:
-            logging.debug(u"{:s}.delete_refs({:#x}) : Decreasing reference count for {!s} at {:s} {:#x}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(key), 'address', ea))
-            if f and not rt: internal.comment.contents.dec(ea, key)
-            else: internal.comment.globals.dec(ea, key)
+        ctx = internal.comment.contents if f and not rt else internal.comment.globals
+        ctx.dec_many(ea, contentkeys)
         return
 
     @classmethod
@@ -261,10 +293,16 @@ class address(changingchanged):
         ea, rpt, new = (yield)
         old = utils.string.of(idaapi.get_cmt(ea, rpt))
 
+        # Figure out the function and whether it's runtime-linked only once,
+        # so that it can be reused for every reference we need to update.
+        extern = cls.get_func_extern(ea)
+
         # Decode the comments into their tags (dictionaries), and
         # then update their references before we update the comment.
-        f, o, n = idaapi.get_func(ea), internal.comment.decode(old), internal.comment.decode(new)
-        cls._update_refs(ea, o, n)
+        # If the comment isn't actually changing, then reuse the old tags.
+        o = internal.comment.decode(old)
+        n = o if old == new else internal.comment.decode(new)
+        cls._update_refs(ea, extern, o, n)
 
         # Wait for cmt_changed event...
         try:
@@ -296,84 +334,91 @@ class address(changingchanged):
 
             # Otherwise, we can just delete all the references at the address.
             else:
-                cls._delete_refs(ea, n)
+                cls._delete_refs(ea, extern, n)
             return
 
         # If the changed event doesn't happen in the right order.
         logging.fatal(u"{:s}.event() : Comment events are out of sync at address {:#x}, updating tags from previous comment. Expected comment ({!s}) is different from current comment ({!s}).".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(o), utils.string.repr(n)))
 
         # Delete the old comment and its references.
-        cls._delete_refs(ea, o)
+        cls._delete_refs(ea, extern, o)
         idaapi.set_cmt(ea, '', rpt)
         logging.warning(u"{:s}.event() : Deleted comment at address {:#x} was {!s}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(o)))
 
         # Create the references for the new comment.
         new = utils.string.of(idaapi.get_cmt(newea, nrpt))
         n = internal.comment.decode(new)
-        cls._create_refs(newea, n)
+        cls._create_refs(newea, extern if newea == ea else cls.get_func_extern(newea), n)
 
     @classmethod
     def changing(cls, ea, repeatable_cmt, newcmt):
+        debug = logging.root.isEnabledFor(logging.DEBUG)
         if not cls.is_ready():
-            return logging.debug(u"{:s}.changing({:#x}, {:d}, {!s}) : Ignoring comment.changing event (database not ready) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, utils.string.repr(newcmt), 'repeatable' if repeatable_cmt else 'non-repeatable', ea))
+            return logging.debug(u"{:s}.changing({:#x}, {:d}, {!s}) : Ignoring comment.changing event (database not ready) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, utils.string.repr(newcmt), 'repeatable' if repeatable_cmt else 'non-repeatable', ea)) if debug else None
         if interface.node.is_identifier(ea):
-            return logging.debug(u"{:s}.changing({:#x}, {:d}, {!s}) : Ignoring comment.changing event (not an address) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, utils.string.repr(newcmt), 'repeatable' if repeatable_cmt else 'non-repeatable', ea))
-
-        # Construct our new state, and then grab our old comment. This is because
-        # we're going to submit this to the state that we've constructed after we've
-        # disabled the necessary events.
-        logging.debug(u"{:s}.changing({:#x}, {:d}, {!s}) : Received comment.changing event for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, utils.string.repr(newcmt), 'repeatable' if repeatable_cmt else 'non-repeatable', ea))
-        event, oldcmt = cls.new(ea), utils.string.of(idaapi.get_cmt(ea, repeatable_cmt))
+            return logging.debug(u"{:s}.changing({:#x}, {:d}, {!s}) : Ignoring comment.changing event (not an address) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, utils.string.repr(newcmt), 'repeatable' if repeatable_cmt else 'non-repeatable', ea)) if debug else None
+
+        # Grab our old comment so that we can check whether the comment is actually
+        # being changed. If it isn't (and there's no incomplete state for the address),
+        # then there's nothing for us to update and we can leave.
+        if debug:
+            logging.debug(u"{:s}.changing({:#x}, {:d}, {!s}) : Received comment.changing event for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, utils.string.repr(newcmt), 'repeatable' if repeatable_cmt else 'non-repeatable', ea))
+        oldcmt = utils.string.of(idaapi.get_cmt(ea, repeatable_cmt))
+        if (oldcmt or '') == (utils.string.of(newcmt) or '') and ea not in cls.__states__:
+            return logging.debug(u"{:s}.changing({:#x}, {:d}, {!s}) : Ignoring comment.changing event (comment is unchanged) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, utils.string.repr(newcmt), 'repeatable' if repeatable_cmt else 'non-repeatable', ea)) if debug else None
+
+        # Construct our new state that we're going to submit the comment to after
+        # we've disabled the necessary events.
+        event = cls.new(ea)
 
         # First disable our hooks so that we can prevent re-entrancy issues
-        [ ui.hook.idb.disable(item) for item in ['changing_cmt', 'cmt_changed'] ]
+        with cls.disabled():
 
-        # Now we can use our coroutine to begin the comment update, so that
-        # later, the "changed" event can do the actual update.
-        try:
-            event.send((ea, bool(repeatable_cmt), utils.string.of(newcmt)))
-
-        # If a StopIteration was raised when submitting the comment to the coroutine,
-        # then something failed and we need to let the user know about it.
-        except StopIteration:
-            logging.fatal(u"{:s}.changing({:#x}, {:d}, {!s}) : Abandoning {:s} comment at {:#x} due to unexpected termination of event handler.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, utils.string.repr(newcmt), 'repeatable' if repeatable_cmt else 'non-repeatable', ea), exc_info=True)
+            # Now we can use our coroutine to begin the comment update, so that
+            # later, the "changed" event can do the actual update.
+            try:
+                event.send((ea, bool(repeatable_cmt), utils.string.of(newcmt)))
 
-        # Last thing to do is to re-enable the hooks that we disabled
-        finally:
-            [ ui.hook.idb.enable(item) for item in ['changing_cmt', 'cmt_changed'] ]
+            # If a StopIteration was raised when submitting the comment to the coroutine,
+            # then something failed and we need to let the user know about it.
+            except StopIteration:
+                logging.fatal(u"{:s}.changing({:#x}, {:d}, {!s}) : Abandoning {:s} comment at {:#x} due to unexpected termination of event handler.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, utils.string.repr(newcmt), 'repeatable' if repeatable_cmt else 'non-repeatable', ea), exc_info=True)
 
         # And then we can leave..
         return
 
     @classmethod
     def changed(cls, ea, repeatable_cmt):
+        debug = logging.root.isEnabledFor(logging.DEBUG)
         if not cls.is_ready():
-            return logging.debug(u"{:s}.changed({:#x}, {:d}) : Ignoring comment.changed event (database not ready) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, 'repeatable' if repeatable_cmt else 'non-repeatable', ea))
+            return logging.debug(u"{:s}.changed({:#x}, {:d}) : Ignoring comment.changed event (database not ready) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, 'repeatable' if repeatable_cmt else 'non-repeatable', ea)) if debug else None
         if interface.node.is_identifier(ea):
-            return logging.debug(u"{:s}.changed({:#x}, {:d}) : Ignoring comment.changed event (not an address) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, 'repeatable' if repeatable_cmt else 'non-repeatable', ea))
+            return logging.debug(u"{:s}.changed({:#x}, {:d}) : Ignoring comment.changed event (not an address) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, 'repeatable' if repeatable_cmt else 'non-repeatable', ea)) if debug else None
+
+        # If there's no state for the address, then the changing event was skipped
+        # because the comment was unchanged and so there's nothing to complete.
+        if debug:
+            logging.debug(u"{:s}.changed({:#x}, {:d}) : Received comment.changed event for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, 'repeatable' if repeatable_cmt else 'non-repeatable', ea))
+        if ea not in cls.__states__:
+            return logging.debug(u"{:s}.changed({:#x}, {:d}) : Ignoring comment.changed event (no state available) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, 'repeatable' if repeatable_cmt else 'non-repeatable', ea)) if debug else None
 
         # Resume the state that was created by the changing event, and then grab
         # our new comment that we will later submit to it.
-        logging.debug(u"{:s}.changed({:#x}, {:d}) : Received comment.changed event for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, 'repeatable' if repeatable_cmt else 'non-repeatable', ea))
         event, newcmt = cls.resume(ea), utils.string.of(idaapi.get_cmt(ea, repeatable_cmt))
 
         # First disable our hooks so that we can prevent re-entrancy issues
-        [ ui.hook.idb.disable(item) for item in ['changing_cmt', 'cmt_changed'] ]
-
-        # Now we can use our coroutine to update the comment state, so that the
-        # coroutine will perform the final update.
-        try:
-            event.send((ea, bool(repeatable_cmt), None))
+        with cls.disabled():
 
-        # If a StopIteration was raised when submitting the comment to the
-        # coroutine, then we something bugged out and we need to let the user
-        # know about it.
-        except StopIteration:
-            logging.fatal(u"{:s}.changed({:#x}, {:d}) : Abandoning update of {:s} comment at {:#x} due to unexpected termination of event handler.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, 'repeatable' if repeatable_cmt else 'non-repeatable', ea), exc_info=True)
+            # Now we can use our coroutine to update the comment state, so that the
+            # coroutine will perform the final update.
+            try:
+                event.send((ea, bool(repeatable_cmt), None))
 
-        # Re-enable our hooks that we had prior disabled
-        finally:
-            [ ui.hook.idb.enable(item) for item in ['changing_cmt', 'cmt_changed'] ]
+            # If a StopIteration was raised when submitting the comment to the
+            # coroutine, then we something bugged out and we need to let the user
+            # know about it.
+            except StopIteration:
+                logging.fatal(u"{:s}.changed({:#x}, {:d}) : Abandoning update of {:s} comment at {:#x} due to unexpected termination of event handler.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, 'repeatable' if repeatable_cmt else 'non-repeatable', ea), exc_info=True)
 
         # Updating the comment was complete, that should've been it and so we can
         # just close our event since we're done.
@@ -381,15 +426,17 @@ class address(changingchanged):
 
     @classmethod
     def old_changed(cls, ea, repeatable_cmt):
+        debug = logging.root.isEnabledFor(logging.DEBUG)
         if not cls.is_ready():
-            return logging.debug(u"{:s}.old_changed({:#x}, {:d}) : Ignoring comment.changed event (database not ready) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, 'repeatable' if repeatable_cmt else 'non-repeatable', ea))
+            return logging.debug(u"{:s}.old_changed({:#x}, {:d}) : Ignoring comment.changed event (database not ready) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, 'repeatable' if repeatable_cmt else 'non-repeatable', ea)) if debug else None
         if interface.node.is_identifier(ea):
-            return logging.debug(u"{:s}.old_changed({:#x}, {:d}) : Ignoring comment.changed event (not an address) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, 'repeatable' if repeatable_cmt else 'non-repeatable', ea))
+            return logging.debug(u"{:s}.old_changed({:#x}, {:d}) : Ignoring comment.changed event (not an address) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, 'repeatable' if repeatable_cmt else 'non-repeatable', ea)) if debug else None
 
         # first we'll grab our comment that the user updated
-        logging.debug(u"{:s}.old_changed({:#x}, {:d}) : Received comment.changed event for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, 'repeatable' if repeatable_cmt else 'non-repeatable', ea))
+        if debug:
+            logging.debug(u"{:s}.old_changed({:#x}, {:d}) : Received comment.changed event for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, repeatable_cmt, 'repeatable' if repeatable_cmt else 'non-repeatable', ea))
         cmt = utils.string.of(idaapi.get_cmt(ea, repeatable_cmt))
-        fn, rt = cls.get_func_extern(ea)
+        extern = fn, rt = cls.get_func_extern(ea)
 
         # if we're in a function but not a runtime-linked one, then we need to
         # to clear our contents here.
@@ -403,21 +450,22 @@ class address(changingchanged):
         # grab the comment and then re-create its references.
         res = internal.comment.decode(cmt)
         if res:
-            cls._create_refs(ea, res)
+            cls._create_refs(ea, extern, res)
 
         # otherwise, there's nothing to do since it's empty.
         else:
             return
 
+        # re-encode the comment, and if it's the same as what's already there
+        # then there's no reason to write it back to the database.
+        encoded = internal.comment.encode(res)
+        if encoded == cmt:
+            return
+
         # re-encode the comment back to its address, but not before disabling
         # our hooks that brought us here so that we can avoid any re-entrancy issues.
-        ui.hook.idb.disable('cmt_changed')
-        try:
-            idaapi.set_cmt(ea, utils.string.to(internal.comment.encode(res)), repeatable_cmt)
-
-        # now we can "finally" re-enable our hook
-        finally:
-            ui.hook.idb.enable('cmt_changed')
+        with cls.disabled('cmt_changed'):
+            idaapi.set_cmt(ea, utils.string.to(encoded), repeatable_cmt)
 
         # and then leave because this should've updated things properly.
         return
@@ -429,36 +477,36 @@ class globals(changingchanged):
     with a function, but just to be certain we check the start_ea of the range
     to determine whether we update the global or content tag cache.
     """
+    # the hooks that need to be disabled while we're handling an event.
+    hooks = ['changing_area_cmt', 'area_cmt_changed'] if idaapi.__version__ < 7.0 else ['changing_range_cmt', 'range_cmt_changed']
+
     @classmethod
     def _update_refs(cls, fn, old, new):
-        oldkeys, newkeys = ({item for item in content.keys()} for content in [old, new])
+        oldkeys, newkeys = ({item for item in content} for content in [old, new])
         logging.debug(u"{:s}.update_refs({:#x}) : Updating old keys ({!s}) to new keys ({!s}).".format('.'.join([__name__, cls.__name__]), interface.range.start(fn) if fn else idaapi.BADADDR, utils.string.repr(oldkeys), utils.string.repr(newkeys)))
-        for key in oldkeys ^ newkeys:
-            if key not in new:
-                logging.debug(u"{:s}.update_refs({:#x}) : Decreasing reference count for {!s} at {:s} {:#x}.".format('.'.join([__name__, cls.__name__]), interface.range.start(fn) if fn else idaapi.BADADDR, utils.string.repr(key), 'function' if fn else 'global', interface.range.start(fn)))
-                internal.comment.globals.dec(interface.range.start(fn), key)
-            if key not in old:
-                logging.debug(u"{:s}.update_refs({:#x}) : Increasing reference count for {!s} at {:s} {:#x}.".format('.'.join([__name__, cls.__name__]), interface.range.start(fn) if fn else idaapi.BADADDR, utils.string.repr(key), 'function' if fn else 'global', interface.range.start(fn)))
-                internal.comment.globals.inc(interface.range.start(fn), key)
-            continue
+
+        # Figure out which keys were removed and added, and then update their reference counts.
+        removed, added = oldkeys - newkeys, newkeys - oldkeys
+        if removed:
+            logging.debug(u"{:s}.update_refs({:#x}) : Decreasing reference count for {!s} at {:s} {:#x}.".format('.'.join([__name__, cls.__name__]), interface.range.start(fn) if fn else idaapi.BADADDR, utils.string.repr(removed), 'function' if fn else 'global', interface.range.start(fn)))
+            internal.comment.globals.dec_many(interface.range.start(fn), removed)
+        if added:
+            logging.debug(u"{:s}.update_refs({:#x}) : Increasing reference count for {!s} at {:s} {:#x}.".format('.'.join([__name__, cls.__name__]), interface.range.start(fn) if fn else idaapi.BADADDR, utils.string.repr(added), 'function' if fn else 'global', interface.range.start(fn)))
+            internal.comment.globals.inc_many(interface.range.start(fn), added)
         return
 
     @classmethod
     def _create_refs(cls, fn, content):
-        contentkeys = {item for item in content.keys()}
+        contentkeys = {item for item in content}
         logging.debug(u"{:s}.create_refs({:#x}) : Creating keys ({!s}).".format('.'.join([__name__, cls.__name__]), interface.range.start(fn) if fn else idaapi.BADADDR, utils.string.repr(contentkeys)))
-        for key in contentkeys:
-            logging.debug(u"{:s}.create_refs({:#x}) : Increasing reference count for {!s} at {:s} {:#x}.".format('.'.join([__name__, cls.__name__]), interface.range.start(fn) if fn else idaapi.BADADDR, utils.string.repr(key), 'function' if fn else 'global', interface.range.start(fn)))
-            internal.comment.globals.inc(interface.range.start(fn), key)
+        internal.comment.globals.inc_many(interface.range.start(fn), contentkeys)
         return
 
     @classmethod
     def _delete_refs(cls, fn, content):
-        contentkeys = {item for item in content.keys()}
+        contentkeys = {item for item in content}
         logging.debug(u"{:s}.delete_refs({:#x}) : Deleting keys ({!s}).".format('.'.join([__name__, cls.__name__]), interface.range.start(fn) if fn else idaapi.BADADDR, utils.string.repr(contentkeys)))
-        for key in contentkeys:
-            logging.debug(u"{:s}.delete_refs({:#x}) : Decreasing reference count for {!s} at {:s} {:#x}.".format('.'.join([__name__, cls.__name__]), interface.range.start(fn) if fn else idaapi.BADADDR, utils.string.repr(key), 'function' if fn else 'global', interface.range.start(fn)))
-            internal.comment.globals.dec(interface.range.start(fn), key)
+        internal.comment.globals.dec_many(interface.range.start(fn), contentkeys)
         return
 
     @classmethod
@@ -471,8 +519,10 @@ class globals(changingchanged):
         old = utils.string.of(idaapi.get_func_cmt(fn, rpt))
 
         # Decode the old and new function comment into their tags so
-        # that we can update their references before the comment.
-        o, n = internal.comment.decode(old), internal.comment.decode(new)
+        # that we can update their references before the comment. If
+        # the comment is the same, then we can reuse the old tags.
+        o = internal.comment.decode(old)
+        n = o if old == new else internal.comment.decode(new)
         cls._update_refs(fn, o, n)
 
         # Wait for cmt_changed event...
@@ -522,58 +572,69 @@ class globals(changingchanged):
 
     @classmethod
     def changing(cls, cb, a, cmt, repeatable):
+        debug = logging.root.isEnabledFor(logging.DEBUG)
         if not cls.is_ready():
-            return logging.debug(u"{:s}.changing({!s}, {:#x}, {!s}, {:d}) : Ignoring comment.changing event (database not ready) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a)))
+            return logging.debug(u"{:s}.changing({!s}, {:#x}, {!s}, {:d}) : Ignoring comment.changing event (database not ready) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a))) if debug else None
         if interface.node.is_identifier(interface.range.start(a)):
-            return logging.debug(u"{:s}.changing({!s}, {:#x}, {!s}, {:d}) : Ignoring comment.changing event (not an address) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a)))
+            return logging.debug(u"{:s}.changing({!s}, {:#x}, {!s}, {:d}) : Ignoring comment.changing event (not an address) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a))) if debug else None
 
         # First we'll check to see if this is an actual function comment by confirming
         # that we're in a function, and that our comment is not empty.
-        logging.debug(u"{:s}.changing({!s}, {:#x}, {!s}, {:d}) : Received comment.changing event for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a)))
+        if debug:
+            logging.debug(u"{:s}.changing({!s}, {:#x}, {!s}, {:d}) : Received comment.changing event for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a)))
         fn = idaapi.get_func(interface.range.start(a))
         if fn is None and not cmt:
             return
 
-        # Construct our new state and grab our old comment so that we can send the
-        # old comment to the state after we've disabled the necessary events.
-        event, oldcmt = cls.new(interface.range.start(a)), utils.string.of(idaapi.get_func_cmt(fn, repeatable))
+        # Grab our old comment so that we can check whether the comment is actually
+        # being changed. If it isn't (and there's no incomplete state for the function),
+        # then there's nothing for us to update and we can leave.
+        oldcmt = utils.string.of(idaapi.get_func_cmt(fn, repeatable))
+        if (oldcmt or '') == (utils.string.of(cmt) or '') and interface.range.start(a) not in cls.__states__:
+            return logging.debug(u"{:s}.changing({!s}, {:#x}, {!s}, {:d}) : Ignoring comment.changing event (comment is unchanged) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a))) if debug else None
 
-        # We need to disable our hooks so that we can prevent re-entrancy issues
-        hooks = ['changing_area_cmt', 'area_cmt_changed'] if idaapi.__version__ < 7.0 else ['changing_range_cmt', 'range_cmt_changed']
-        [ ui.hook.idb.disable(item) for item in hooks ]
+        # Construct our new state that we'll send the comment to after we've
+        # disabled the necessary events.
+        event = cls.new(interface.range.start(a))
 
-        # Now we can use our coroutine to begin the comment update, so that
-        # later, the "changed" event can do the actual update.
-        try:
-            event.send((interface.range.start(fn), bool(repeatable), utils.string.of(cmt)))
+        # We need to disable our hooks so that we can prevent re-entrancy issues
+        with cls.disabled():
 
-        # If a StopIteration was raised when submitting the comment to the
-        # coroutine, then something terrible has happened and we need to let
-        # the user know what's up.
-        except StopIteration:
-            logging.fatal(u"{:s}.changing({!s}, {:#x}, {!s}, {:d}) : Abandoning {:s} function comment at {:#x} due to unexpected termination of event handler.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', ea), exc_info=True)
+            # Now we can use our coroutine to begin the comment update, so that
+            # later, the "changed" event can do the actual update.
+            try:
+                event.send((interface.range.start(fn), bool(repeatable), utils.string.of(cmt)))
 
-        # Last thing to do is to re-enable the hooks that we disabled
-        finally:
-            [ ui.hook.idb.enable(item) for item in hooks ]
+            # If a StopIteration was raised when submitting the comment to the
+            # coroutine, then something terrible has happened and we need to let
+            # the user know what's up.
+            except StopIteration:
+                logging.fatal(u"{:s}.changing({!s}, {:#x}, {!s}, {:d}) : Abandoning {:s} function comment at {:#x} due to unexpected termination of event handler.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', ea), exc_info=True)
 
         # And then we're ready for the "changed" event
         return
 
     @classmethod
     def changed(cls, cb, a, cmt, repeatable):
+        debug = logging.root.isEnabledFor(logging.DEBUG)
         if not cls.is_ready():
-            return logging.debug(u"{:s}.changed({!s}, {:#x}, {!s}, {:d}) : Ignoring comment.changed event (database not ready) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a)))
+            return logging.debug(u"{:s}.changed({!s}, {:#x}, {!s}, {:d}) : Ignoring comment.changed event (database not ready) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a))) if debug else None
         if interface.node.is_identifier(interface.range.start(a)):
-            return logging.debug(u"{:s}.changed({!s}, {:#x}, {!s}, {:d}) : Ignoring comment.changed event (not an address) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a)))
+            return logging.debug(u"{:s}.changed({!s}, {:#x}, {!s}, {:d}) : Ignoring comment.changed event (not an address) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a))) if debug else None
 
         # First we'll check to see if this is an actual function comment by confirming
         # that we're in a function, and that our comment is not empty.
-        logging.debug(u"{:s}.changed({!s}, {:#x}, {!s}, {:d}) : Received comment.changed event for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a)))
+        if debug:
+            logging.debug(u"{:s}.changed({!s}, {:#x}, {!s}, {:d}) : Received comment.changed event for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a)))
         fn = idaapi.get_func(interface.range.start(a))
         if fn is None and not cmt:
             return
 
+        # If there's no state for the function, then the changing event was skipped
+        # because the comment was unchanged and so there's nothing to complete.
+        if interface.range.start(a) not in cls.__states__:
+            return logging.debug(u"{:s}.changed({!s}, {:#x}, {!s}, {:d}) : Ignoring comment.changed event (no state available) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a))) if debug else None
+
         # Resume the state that was prior created by the changing event, and grab
         # our new comment. As the state keeps track of the old comment and the new
         # one we're going to send to it once we disable some events, it will know
@@ -581,23 +642,18 @@ class globals(changingchanged):
         event, newcmt = cls.resume(interface.range.start(a)), utils.string.of(idaapi.get_func_cmt(fn, repeatable))
 
         # We need to disable our hooks so that we can prevent re-entrancy issues
-        hooks = ['changing_area_cmt', 'area_cmt_changed'] if idaapi.__version__ < 7.0 else ['changing_range_cmt', 'range_cmt_changed']
-        [ ui.hook.idb.disable(item) for item in hooks ]
+        with cls.disabled():
 
-        # Now we can use our coroutine to update the comment state, so that the
-        # coroutine will perform the final update.
-        try:
-            event.send((interface.range.start(fn), bool(repeatable), None))
-
-        # If a StopIteration was raised when submitting the comment to the
-        # coroutine, then we something terrible has happend that the user will
-        # likely need to know about.
-        except StopIteration:
-            logging.fatal(u"{:s}.changed({!s}, {:#x}, {!s}, {:d}) : Abandoning update of {:s} function comment at {:#x} due to unexpected termination of event handler.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', ea), exc_info=True)
+            # Now we can use our coroutine to update the comment state, so that the
+            # coroutine will perform the final update.
+            try:
+                event.send((interface.range.start(fn), bool(repeatable), None))
 
-        # Last thing to do is to re-enable the hooks that we disabled
-        finally:
-            [ ui.hook.idb.enable(item) for item in hooks ]
+            # If a StopIteration was raised when submitting the comment to the
+            # coroutine, then we something terrible has happend that the user will
+            # likely need to know about.
+            except StopIteration:
+                logging.fatal(u"{:s}.changed({!s}, {:#x}, {!s}, {:d}) : Abandoning update of {:s} function comment at {:#x} due to unexpected termination of event handler.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', ea), exc_info=True)
 
         # We're done updating the comment and our state is done, so we can
         # close it to release it from existence.
@@ -605,14 +661,16 @@ class globals(changingchanged):
 
     @classmethod
     def old_changed(cls, cb, a, cmt, repeatable):
+        debug = logging.root.isEnabledFor(logging.DEBUG)
         if not cls.is_ready():
-            return logging.debug(u"{:s}.old_changed({!s}, {:#x}, {!s}, {:d}) : Ignoring comment.changed event (database not ready) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a)))
+            return logging.debug(u"{:s}.old_changed({!s}, {:#x}, {!s}, {:d}) : Ignoring comment.changed event (database not ready) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a))) if debug else None
         if interface.node.is_identifier(interface.range.start(a)):
-            return logging.debug(u"{:s}.old_changed({!s}, {:#x}, {!s}, {:d}) : Ignoring comment.changed event (not an address) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a)))
+            return logging.debug(u"{:s}.old_changed({!s}, {:#x}, {!s}, {:d}) : Ignoring comment.changed event (not an address) for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a))) if debug else None
 
         # first thing to do is to identify whether we're in a function or not,
         # so we first grab the address from the area_t...
-        logging.debug(u"{:s}.old_changed({!s}, {:#x}, {!s}, {:d}) : Received comment.changed event for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a)))
+        if debug:
+            logging.debug(u"{:s}.old_changed({!s}, {:#x}, {!s}, {:d}) : Received comment.changed event for a {:s} comment at {:#x}.".format('.'.join([__name__, cls.__name__]), utils.string.repr(cb), interface.range.start(a), utils.string.repr(cmt), repeatable, 'repeatable' if repeatable else 'non-repeatable', interface.range.start(a)))
         ea = interface.range.start(a)
 
         # then we can use it to verify that we're in a function. if not, then
@@ -625,7 +683,8 @@ class globals(changingchanged):
         internal.comment.globals.set_address(ea, 0)
 
         # grab our comment here and re-create its refs
-        res = internal.comment.decode(utils.string.of(cmt))
+        string = utils.string.of(cmt)
+        res = internal.comment.decode(string)
         if res:
             cls._create_refs(fn, res)
 
@@ -633,20 +692,24 @@ class globals(changingchanged):
         else:
             return
 
+        # if re-encoding the comment results in the very same comment, then
+        # there's nothing that needs to be re-written and we can leave.
+        encoded = internal.comment.encode(res)
+        if encoded == string:
+            return
+
         # now we can simply re-write it it, but not before disabling our hooks
         # that got us here, so that we can avoid any re-entrancy issues.
-        ui.hook.idb.disable('area_cmt_changed')
-        try:
-            idaapi.set_func_cmt(fn, utils.string.to(internal.comment.encode(res)), repeatable)
-
-        # now we can "finally" re-enable our hook
-        finally:
-            ui.hook.idb.enable('area_cmt_changed')
+        with cls.disabled('area_cmt_changed'):
+            idaapi.set_func_cmt(fn, utils.string.to(encoded), repeatable)
 
         # that should've been it, so we can now just leave
         return
 
 class typeinfo(changingchanged):
+    # the hooks that need to be disabled while we're handling an event.
+    hooks = ['changing_ti', 'ti_changed']
+
     @classmethod
     def updater(cls):
         # All typeinfo are global tags unless they're being applied to an
@@ -692,33 +755,36 @@ class typeinfo(changingchanged):
         # only need to determine if we need to add its reference back.
         if any(tidata):
             ctx.inc(new_ea, '__typeinfo__')
-            logging.debug(u"{:s}.event() : Updated the type information at address {:#x} and {:s} its reference ({!r} -> {!r}).".format('.'.join([__name__, cls.__name__]), new_ea, 'kept' if original == tidata else 'increased', bytes().join(original), bytes().join(tidata)))
+            if logging.root.isEnabledFor(logging.DEBUG):
+                logging.debug(u"{:s}.event() : Updated the type information at address {:#x} and {:s} its reference ({!r} -> {!r}).".format('.'.join([__name__, cls.__name__]), new_ea, 'kept' if original == tidata else 'increased', bytes().join(original), bytes().join(tidata)))
 
         # For the sake of debugging, log that we just removed the typeinfo
         # from the current address. We don't need to decrease our reference
         # here because we did it already when we git our "changing" event.
-        else:
+        elif logging.root.isEnabledFor(logging.DEBUG):
             logging.debug(u"{:s}.event() : Removed the type information from address {:#x} and its reference ({!r} -> {!r}).".format('.'.join([__name__, cls.__name__]), new_ea, bytes().join(original), bytes().join(tidata)))
         return
 
     @classmethod
     def changing(cls, ea, new_type, new_fname):
+        debug = logging.root.isEnabledFor(logging.DEBUG)
         if not cls.is_ready():
-            return logging.debug(u"{:s}.changing({:#x}, {!s}, {!s}) : Ignoring typeinfo.changing event (database not ready) with new type ({!s}) and new name ({!s}) at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(new_type), utils.string.repr(new_fname), utils.string.repr(new_type), new_fname, ea))
+            return logging.debug(u"{:s}.changing({:#x}, {!s}, {!s}) : Ignoring typeinfo.changing event (database not ready) at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(new_type), utils.string.repr(new_fname), ea)) if debug else None
         if interface.node.is_identifier(ea):
-            return logging.debug(u"{:s}.changing({:#x}, {!s}, {!s}) : Ignoring typeinfo.changing event (not an address) with new type ({!s}) and new name ({!s}) at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(new_type), utils.string.repr(new_fname), utils.string.repr(new_type), new_fname, ea))
+            return logging.debug(u"{:s}.changing({:#x}, {!s}, {!s}) : Ignoring typeinfo.changing event (not an address) at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(new_type), utils.string.repr(new_fname), ea)) if debug else None
 
         # Verify that the address is within our database boundaries because IDA
         # can actually create "extra" comments outside of the database.
         try:
             ea = interface.address.within(ea)
         except E.OutOfBoundsError:
-            return logging.debug(u"{:s}.changing({:#x}, {!s}, {!s}) : Ignoring typeinfo.changing event (not a valid address) with new type ({!s}) and new name ({!s}) at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(new_type), utils.string.repr(new_fname), utils.string.repr(new_type), new_fname, ea))
+            return logging.debug(u"{:s}.changing({:#x}, {!s}, {!s}) : Ignoring typeinfo.changing event (not a valid address) at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(new_type), utils.string.repr(new_fname), ea)) if debug else None
 
         # Extract the previous type information from the given address. If none
         # was found, then just use empty strings because these are compared to the
         # new values by the event.
-        logging.debug(u"{:s}.changing({:#x}, {!s}, {!s}) : Received typeinfo.changing for new_type ({!s}) and new_fname ({!s}).".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(new_type), utils.string.repr(new_fname), utils.string.repr(new_type), new_fname))
+        if debug:
+            logging.debug(u"{:s}.changing({:#x}, {!s}, {!s}) : Received typeinfo.changing for new_type ({!s}) and new_fname ({!s}).".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(new_type), utils.string.repr(new_fname), utils.string.repr(new_type), new_fname))
 
         ti = database.type(ea)
         old_type, old_fname, _ = (b'', b'', None) if ti is None else ti.serialize()
@@ -730,65 +796,61 @@ class typeinfo(changingchanged):
         original, new = (old_type, old_fname or b''), (new_type or b'', new_fname or b'')
 
         # First disable our hooks so that we can prevent re-entrancy issues.
-        [ ui.hook.idb.disable(item) for item in ['changing_ti', 'ti_changed'] ]
+        with cls.disabled():
 
-        # Now we can use our coroutine to begin updating the typeinfo tag. We
-        # submit the previous values (prior to the typeinfo being changed) because
-        # the "changed" event (which will be dispatched afterwards) is responsible
-        # for performing the actual update of the cache.
-        try:
-            event.send((ea, original, new))
+            # Now we can use our coroutine to begin updating the typeinfo tag. We
+            # submit the previous values (prior to the typeinfo being changed) because
+            # the "changed" event (which will be dispatched afterwards) is responsible
+            # for performing the actual update of the cache.
+            try:
+                event.send((ea, original, new))
 
-        # If we encounter a StopIteration while submitting the comment, then the
-        # coroutine has gone out of control and we need to let the user know.
-        except StopIteration:
-            logging.fatal(u"{:s}.changed({:#x}, {!s}, {!s}) : Abandoning type information at {:#x} due to unexpected termination of event handler.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(new_type), utils.string.repr(new_fname), ea), exc_info=True)
+            # If we encounter a StopIteration while submitting the comment, then the
+            # coroutine has gone out of control and we need to let the user know.
+            except StopIteration:
+                logging.fatal(u"{:s}.changed({:#x}, {!s}, {!s}) : Abandoning type information at {:#x} due to unexpected termination of event handler.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(new_type), utils.string.repr(new_fname), ea), exc_info=True)
 
-        # Last thing to do is to re-enable the hooks that we disabled and then leave.
-        finally:
-            [ ui.hook.idb.enable(item) for item in ['changing_ti', 'ti_changed'] ]
         return
 
     @classmethod
     def changed(cls, ea, type, fnames):
+        debug = logging.root.isEnabledFor(logging.DEBUG)
         if not cls.is_ready():
-            return logging.debug(u"{:s}.changed({:#x}, {!s}, {!s}) : Ignoring typeinfo.changed event (database not ready) with type ({!s}) and name ({!s}) at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(type), utils.string.repr(fnames), utils.string.repr(type), fnames, ea))
+            return logging.debug(u"{:s}.changed({:#x}, {!s}, {!s}) : Ignoring typeinfo.changed event (database not ready) at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(type), utils.string.repr(fnames), ea)) if debug else None
         if interface.node.is_identifier(ea):
-            return logging.debug(u"{:s}.changed({:#x}, {!s}, {!s}) : Ignoring typeinfo.changed event (not an address) with type ({!s}) and name ({!s}) at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(type), utils.string.repr(fnames), utils.string.repr(type), fnames, ea))
+            return logging.debug(u"{:s}.changed({:#x}, {!s}, {!s}) : Ignoring typeinfo.changed event (not an address) at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(type), utils.string.repr(fnames), ea)) if debug else None
 
         # Verify that the address is within our database boundaries because IDA
         # can actually create "extra" comments outside of the database.
         try:
             ea = interface.address.within(ea)
         except E.OutOfBoundsError:
-            return logging.debug(u"{:s}.changed({:#x}, {!s}, {!s}) : Ignoring typeinfo.changed event (not a valid address) with type ({!s}) and name ({!s}) at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(type), utils.string.repr(fnames), utils.string.repr(type), fnames, ea))
+            return logging.debug(u"{:s}.changed({:#x}, {!s}, {!s}) : Ignoring typeinfo.changed event (not a valid address) at {:#x}.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(type), utils.string.repr(fnames), ea)) if debug else None
 
         # Resume the state for the current address, and then take the data from
         # our parameters (which IDA is telling us was just written) and pack
         # them into a tuple. This way we can send them to the state after we
         # disable the necessary hooks to prevent re-entrancy.
-        logging.debug(u"{:s}.changed({:#x}, {!s}, {!s}) : Received typeinfo.changed event with type ({!s}) and name ({!s}).".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(type), utils.string.repr(fnames), utils.string.repr(type), fnames))
+        if debug:
+            logging.debug(u"{:s}.changed({:#x}, {!s}, {!s}) : Received typeinfo.changed event with type ({!s}) and name ({!s}).".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(type), utils.string.repr(fnames), utils.string.repr(type), fnames))
         event, new = cls.resume(ea), (type or b'', fnames or b'')
 
         # First disable our hooks so that we can prevent re-entrancy issues.
-        [ ui.hook.idb.disable(item) for item in ['changing_ti', 'ti_changed'] ]
+        with cls.disabled():
 
-        # Now we can use our coroutine to update the typeinfo tag. As IDA was
-        # kind enough to provide the new values, we can just submit them to the
-        # coroutine.
-        try:
-            event.send((ea, new))
+            # Now we can use our coroutine to update the typeinfo tag. As IDA was
+            # kind enough to provide the new values, we can just submit them to the
+            # coroutine.
+            try:
+                event.send((ea, new))
 
-        # If we encounter a StopIteration while submitting the comment, then the
-        # coroutine has terminated unexpectedly which is a pretty critical issue.
-        except StopIteration:
-            logging.fatal(u"{:s}.changed({:#x}, {!s}, {!s}) : Abandoning update of type information at {:#x} due to unexpected termination of event handler.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(type), utils.string.repr(fnames), ea), exc_info=True)
+            # If we encounter a StopIteration while submitting the comment, then the
+            # coroutine has terminated unexpectedly which is a pretty critical issue.
+            except StopIteration:
+                logging.fatal(u"{:s}.changed({:#x}, {!s}, {!s}) : Abandoning update of type information at {:#x} due to unexpected termination of event handler.".format('.'.join([__name__, cls.__name__]), ea, utils.string.repr(type), utils.string.repr(fnames), ea), exc_info=True)
 
-        # Last thing to do is to re-enable the hooks that we disabled and then
-        # close our state since we're done with it and there shouldn't be
-        # anything left to do for this address.
-        finally:
-            [ ui.hook.idb.enable(item) for item in ['changing_ti', 'ti_changed'] ]
+        # Last thing to do is to close our state since we're done with it and
+        # there shouldn't be anything left to do for this address.
         event.close()
 
 ### database scope
@@ -894,6 +956,31 @@ def auto_queue_empty(type):
     if type == idaapi.AU_FINAL:
         on_ready()
 
+def __collect_imports():
+    '''Return a set containing the address of every import in the database.'''
+    imports = {item for item in []}
+    for idx in range(idaapi.get_import_module_qty()):
+        idaapi.enum_import_names(idx, lambda address, name, ordinal: imports.add(address) or True)
+    return imports
+
+def __collect_functions(start, stop):
+    '''Return a list containing the address of every function that begins from `start` up to `stop` (exclusive).'''
+    result = []
+
+    # Start at the function that begins at `start` if there is one. Otherwise we
+    # ask IDA for the next one, so that we only visit the functions in the range.
+    pfn = idaapi.get_func(start)
+    if pfn is None or interface.range.start(pfn) != start:
+        pfn = idaapi.get_next_func(start)
+
+    # Now we can continue collecting each function until we've left the range.
+    while pfn and interface.range.start(pfn) < stop:
+        ea = interface.range.start(pfn)
+        if idaapi.segtype(ea) != idaapi.SEG_XTRN:
+            result.append(ea)
+        pfn = idaapi.get_next_func(ea)
+    return result
+
 def __process_functions(percentage=0.10):
     """This prebuilds the tag cache and index for the entire database so that we can differentiate tags made by the user and the application.
 
@@ -905,12 +992,15 @@ def __process_functions(percentage=0.10):
     # Now we need to gather all of our imports so that we can clean up any functions
     # that are runtime-linked addresses. This is because IDA seems to create a
     # func_t for certain imports.
-    imports = {item for item in []}
-    for idx in range(idaapi.get_import_module_qty()):
-        idaapi.enum_import_names(idx, lambda address, name, ordinal: imports.add(address) or True)
+    imports = __collect_imports()
 
     # Now that we have our imports, we can iterate through all of the functions.
+    # Refreshing the progress bar isn't free, so we also track when we last did it.
     total, funcs = 0, [ea for ea in database.functions()]
+    updated, interval = 0.0, 0.05
+
+    # Figure out how often we need to output which function is being processed.
+    stride = int(len(funcs) * percentage) or 1
     P.update(current=0, max=len(funcs), title=u"Pre-building the tag cache and its index...")
     P.open()
     six.print_(u"Indexing the tags for {:d} functions.".format(len(funcs)))
@@ -941,11 +1031,15 @@ def __process_functions(percentage=0.10):
         if fn in imports:
             continue
 
-        # Update the progress bar with the current function we're working on.
-        text = functools.partial(u"Processing function {:#x} ({chunks:d} chunk{plural:s}) -> {:d} of {:d}".format, fn, 1 + i, len(funcs))
-        P.update(current=i)
-        ui.navigation.procedure(fn)
-        if i % (int(len(funcs) * percentage) or 1) == 0:
+        # Update the progress bar with the current function we're working on, but
+        # only if enough time has passed since the last time that we updated it.
+        now = time.time()
+        refresh = now - updated >= interval
+        if refresh:
+            P.update(current=i)
+            ui.navigation.procedure(fn)
+            updated = now
+        if i % stride == 0:
             six.print_(u"Processing function {:#x} -> {:d} of {:d} ({:.02f}%)".format(fn, 1 + i, len(funcs), i / float(len(funcs)) * 100.0))
 
         # If the current function is not in our globals, but it has a name tag, then
@@ -958,7 +1052,9 @@ def __process_functions(percentage=0.10):
         # it to tally up all of the reference counts for the tags.
         contents = {item for item in internal.comment.contents.address(fn, target=fn)}
         for ci, (l, r) in enumerate(chunks):
-            P.update(text=text(chunks=len(chunks), plural='' if len(chunks) == 1 else 's'), tooltip="Chunk #{:d} : {:#x} - {:#x}".format(ci, l, r))
+            if refresh:
+                text = u"Processing function {:#x} ({:d} chunk{:s}) -> {:d} of {:d}".format(fn, len(chunks), '' if len(chunks) == 1 else 's', 1 + i, len(funcs))
+                P.update(text=text, tooltip="Chunk #{:d} : {:#x} - {:#x}".format(ci, l, r))
 
             # Iterate through each address in the function, only updating the
             # references for tags that are not in our set of implicit ones.
@@ -1015,9 +1111,22 @@ def relocate(info):
     logging.info(u"{:s}.relocate({:#x}, {:#x}) : Relocating the tag cache and index for {:d} segment{:s}.".format(__name__, segmap[listable[0]], listable[0], scount, '' if scount == 1 else 's'))
 
     # Now we'll need to iterate through our functions and globals in order to filter
-    # them and calculate the number of items we'll be expecting to process.
-    count = sum(1 for ea in functions if any(info[si].to <= ea <= info[si].to + info[si].size for si in range(info.size())))
-    count+= sum(1 for ea, _ in globals if any(info[si]._from <= ea <= info[si]._from + info[si].size for si in range(info.size())))
+    # them and calculate the number of items we'll be expecting to process. Segments
+    # can't overlap, so we sort their boundaries and bisect them to find the segment
+    # that an address could belong to.
+    def contains(ea, starts, boundaries):
+        index = bisect.bisect_right(starts, ea) - 1
+        return index >= 0 and ea <= boundaries[index][1]
+
+    targets = sorted((info[si].to, info[si].to + info[si].size) for si in range(scount))
+    sources = sorted((info[si]._from, info[si]._from + info[si].size) for si in range(scount))
+    tstarts, sstarts = ([start for start, _ in boundaries] for boundaries in [targets, sources])
+    count = sum(1 for ea in functions if contains(ea, tstarts, targets))
+    count+= sum(1 for ea, _ in globals if contains(ea, sstarts, sources))
+
+    # Gather our imports once, since they won't change while we're relocating
+    # each segment and they're needed to clean up any runtime-linked functions.
+    imports = __collect_imports()
 
     # Create our progress bar that we'll continuously update using the number of
     # items that we just calculated from filtering our functions and globals.
@@ -1025,6 +1134,9 @@ def relocate(info):
     P.update(current=0, min=0, max=count, title=u"Relocating the tag cache and index for {:d} segment{:s}...".format(scount, '' if scount == 1 else 's'))
     fcount = gcount = 0
 
+    # Refreshing the progress bar isn't free, so we track the last time we did it.
+    updated, interval = 0.0, 0.05
+
     # Iterate through each work item (segment) in order to process them.
     P.open()
     for si in range(scount):
@@ -1052,42 +1164,53 @@ def relocate(info):
         # using a version of IDA prior to 7.3, then when our event has been dispatched
         # the netnodes have already been moved.
         listable = [ea for ea in functions if info[si].to <= ea < info[si].to + info[si].size]
-        for i, offset in __relocate_function(info[si]._from, info[si].to, info[si].size, (item for item in listable), moved=True if idaapi.__version__ < 7.3 else False):
+        for i, offset in __relocate_function(info[si]._from, info[si].to, info[si].size, iter(listable), moved=True if idaapi.__version__ < 7.3 else False, imports=imports):
+            now = time.time()
+            if now - updated < interval:
+                continue
             name = database.name(info[si].to + offset)
             text = u"Relocating function {:d} of {:d}{:s}: {:#x} -> {:#x}".format(1 + i, len(listable), " ({:s})".format(name) if name else '', info[si]._from + offset, info[si].to + offset)
             P.update(value=sum([fcount, gcount, i]), text=text)
             ui.navigation.procedure(info[si].to + offset)
+            updated = now
         fcount += len(listable)
 
         # Iterate through all of the globals that were moved.
         listable = [(ea, count) for ea, count in globals if info[si]._from <= ea < info[si]._from + info[si].size]
-        for i, offset in __relocate_globals(info[si]._from, info[si].to, info[si].size, (item for item in listable)):
+        for i, offset in __relocate_globals(info[si]._from, info[si].to, info[si].size, iter(listable)):
+            now = time.time()
+            if now - updated < interval:
+                continue
             name = database.name(info[si].to + offset)
             text = u"Relocating global {:d} of {:d}{:s}: {:#x} -> {:#x}".format(1 + i, len(listable), " ({:s})".format(name) if name else '', info[si]._from + offset, info[si].to + offset)
             P.update(value=sum([fcount, gcount, i]), text=text)
             ui.navigation.analyze(info[si].to + offset)
+            updated = now
         gcount += len(listable)
     P.close()
 
-def __relocate_function(old, new, size, iterable, moved=False):
+def __relocate_function(old, new, size, iterable, moved=False, imports=None):
     """Relocate the function addresses in `iterable` from address `old` to `new` adjusting them by the specified `size`.
 
     If `moved` is specified as true, then the netnodes are already at their target
     as per "Move Segment(s)". Otherwise they're still at their original address
     which happens when the database has been relocated via "Rebase Program".
+    If `imports` is specified, then use it as the set of import addresses.
     """
-    key = internal.comment.tagging.__address__
+    debug = logging.root.isEnabledFor(logging.DEBUG)
+    key, delta = internal.comment.tagging.__address__, new - old
+    read, write = internal.comment.contents._read, internal.comment.contents._write
     failure, total, index = [], [item for item in iterable], {ea : keys for ea, keys in internal.comment.contents.iterate() if old <= ea < old + size}
 
     for i, fn in enumerate(total):
         offset = fn - new
-        source, target = offset + old, offset + new
+        source, target = fn - delta, fn
 
         # Grab the contents tags from the former function's netnode. If the netnode has
         # already been moved, then use the function we were given. Otherwise we can just
         # use the old offset.
         try:
-            state = internal.comment.contents._read(target if moved else source, offset + old)
+            state = read(target if moved else source, offset + old)
 
         except E.FunctionNotFoundError:
             logging.fatal(u"{:s}.relocate_function({:#x}, {:#x}, {:+#x}, {!r}) : Unable to locate the original function address ({:#x}) while trying to transform to {:#x}.".format(__name__, old, new, size, iterable, offset + old, offset + new), exc_info=True)
@@ -1100,12 +1223,12 @@ def __relocate_function(old, new, size, iterable, moved=False):
             continue
 
         # Erase the old contents tags since we've already loaded its state.
-        internal.comment.contents._write(source, offset + old, None)
+        write(source, offset + old, None)
         logging.info(u"{:s}.relocate_function({:#x}, {:#x}, {:+#x}, {!r}) : Cleared contents of function {:#x} at old address {:#x}.".format(__name__, old, new, size, iterable, fn, offset + old))
 
         # If there wasn't a value in our contents index, then warn the user
         # before we remove it. We use this later to figure out any strays.
-        if not operator.contains(index, source):
+        if source not in index:
             logging.warning(u"{:s}.relocate_function({:#x}, {:#x}, {:+#x}, {!r}) : Found contents for function {:#x} at old address {:#x} that wasn't in index.".format(__name__, old, new, size, iterable, fn, source))
         index.pop(source, None)
 
@@ -1117,32 +1240,33 @@ def __relocate_function(old, new, size, iterable, moved=False):
             logging.warning(u"{:s}.relocate_function({:#x}, {:#x}, {:+#x}, {!r}) : Missing address cache while translating address {:#x} -> {:#x}.".format(__name__, old, new, size, iterable, offset + old, offset + new))
 
         # Update the state containing the old addresses with the newly transformed ones.
-        res, state[key] = state[key], {ea - old + new : ref for ea, ref in state[key].items()}
+        res, state[key] = state[key], {ea + delta : ref for ea, ref in state[key].items()}
 
         # And then we can write the modified state back to the function's netnode.
-        ok = internal.comment.contents._write(fn, fn, state)
+        ok = write(fn, fn, state)
         if not ok:
             logging.fatal(u"{:s}.relocate_function({:#x}, {:#x}, {:+#x}, {!r}) : Failure trying to write reference count for function {:#x} while trying to update old reference count ({!s}) to new one ({!s}).".format(__name__, old, new, size, iterable, fn, utils.string.repr(res), utils.string.repr(state[key])))
             failure.append((fn, res, state[key]))
 
         # We successfully processed this function, so yield its index and offset.
-        logging.debug(u"{:s}.relocate_function({:#x}, {:#x}, {:+#x}, {!r}) : Relocated {:d} content locations for function {:#x} using delta {:+#x}.".format(__name__, old, new, size, iterable, len(state[key]), fn, new - old))
+        if debug:
+            logging.debug(u"{:s}.relocate_function({:#x}, {:#x}, {:+#x}, {!r}) : Relocated {:d} content locations for function {:#x} using delta {:+#x}.".format(__name__, old, new, size, iterable, len(state[key]), fn, new - old))
         yield i, offset
 
-    # Now we need to gather all of our imports so that we can clean up any functions
-    # that are runtime-linked addresses. This is because IDA seems to create a
-    # func_t for certain imports.
-    imports = {item for item in []}
-    for idx in range(idaapi.get_import_module_qty()):
-        idaapi.enum_import_names(idx, lambda address, name, ordinal: imports.add(address) or True)
+    # Now we need to gather all of our imports (if we weren't given them) so that we
+    # can clean up any functions that are runtime-linked addresses. This is because
+    # IDA seems to create a func_t for certain imports.
+    imports = __collect_imports() if imports is None else imports
 
-    # Iterate through our index grabbing anything that's in our imports.
-    items = {ea - old + new for ea in index}
-    for ea in items & imports:
+    # Iterate through our imports grabbing anything that's in our index. We do it
+    # in this direction so that we don't need to transform every address in it.
+    for ea in imports:
         offset = ea - new
-        source, target = offset + old, offset + new
+        source, target = ea - delta, ea
+        if source not in index:
+            continue
         logging.info(u"{:s}.relocate_function({:#x}, {:#x}, {:+#x}, {!r}) : Removing contents of runtime-linked function ({:#x}) from index at {:#x}.".format(__name__, old, new, size, iterable, target, source))
-        internal.comment.contents._write(source, offset + old, None)
+        write(source, offset + old, None)
         index.pop(source)
 
     # Last thing to do is to clean up the stray contents from the index that weren't
@@ -1167,30 +1291,29 @@ def __relocate_function(old, new, size, iterable, moved=False):
 
         # Now we know why this address is within our index, so all that
         # we really need to do is to remove it.
-        internal.comment.contents._write(ea, ea, None)
-        logging.debug(u"{:s}.relocate_function({:#x}, {:#x}, {:+#x}, {!r}) : Cleared stray contents for {:#x} at old address {:#x}.".format(__name__, old, new, size, iterable, offset + new, offset + old))
+        write(ea, ea, None)
+        if debug:
+            logging.debug(u"{:s}.relocate_function({:#x}, {:#x}, {:+#x}, {!r}) : Cleared stray contents for {:#x} at old address {:#x}.".format(__name__, old, new, size, iterable, offset + new, offset + old))
     return
 
 def __relocate_globals(old, new, size, iterable):
     '''Relocate the global tuples (address, count) in `iterable` from address `old` to `new` adjusting them by the specified `size`.'''
+    debug = logging.root.isEnabledFor(logging.DEBUG)
     node = internal.comment.tagging.node()
-    failure, total = [], [item for item in iterable]
-    for i, (ea, count) in enumerate(total):
-        offset = ea - old
-
-        # Remove the old address from the netnode cache (altval) with our global.
-        ok = internal.netnode.alt.remove(node, ea)
-        if not ok:
-            logging.fatal(u"{:s}.relocate_globals({:#x}, {:#x}, {:+#x}, {!r}) : Failure trying to remove reference count ({!r}) for global {:#x}.".format(__name__, old, new, size, iterable, count, ea))
+    total = [item for item in iterable]
 
-        # Now we can re-add the new address to the netnode cache (altval).
-        ok = internal.netnode.alt.set(node, new + offset, count)
-        if not ok:
-            logging.fatal(u"{:s}.relocate_globals({:#x}, {:#x}, {:+#x}, {!r}) : Failure trying to store reference count ({!r}) from {:#x} to {:#x}.".format(__name__, old, new, size, iterable, count, ea, new + offset))
-            failure.append((ea, new + offset, count))
+    # Move all of the old addresses in the netnode cache (altval) to their new
+    # address at once. This removes every old address before storing any of the
+    # new ones, so that relocating by less than the size doesn't lose any counts.
+    failure = internal.netnode.alt.move(node, [(ea, new + ea - old) for ea, _ in total])
+    for ea, target, count in failure:
+        logging.fatal(u"{:s}.relocate_globals({:#x}, {:#x}, {:+#x}, {!r}) : Failure trying to store reference count ({!r}) from {:#x} to {:#x}.".format(__name__, old, new, size, iterable, count, ea, target))
 
-        # Yield the offset to the global that we just processed.
-        logging.debug(u"{:s}.relocate_globals({:#x}, {:#x}, {:+#x}, {!r}) : Relocated count ({:d}) for global {:#x} from {:#x} to {:#x}.".format(__name__, old, new, size, iterable, count, ea, old + offset, new + offset))
+    # Now we can go through each global that we processed and yield its offset.
+    for i, (ea, count) in enumerate(total):
+        offset = ea - old
+        if debug:
+            logging.debug(u"{:s}.relocate_globals({:#x}, {:#x}, {:+#x}, {!r}) : Relocated count ({:d}) for global {:#x} from {:#x} to {:#x}.".format(__name__, old, new, size, iterable, count, ea, old + offset, new + offset))
         yield i, offset
     return
 
@@ -1215,31 +1338,56 @@ def segm_moved(source, destination, size, changed_netmap):
     seg = idaapi.getseg(destination)
 
     # Pre-calculate our search boundaries, collect all of the functions and globals,
-    # and then total the number of items that we expect to process.
-    functions = sorted(ea for ea in database.functions() if destination <= ea < destination + size)
-    globals = sorted((ea, count) for ea, count in internal.comment.globals.iterate() if source <= ea < source + size)
+    # and then total the number of items that we expect to process. The functions
+    # are collected directly from the range, and the globals are yielded in address
+    # order so we only need to filter them.
+    functions = __collect_functions(destination, destination + size)
+    globals = [(ea, count) for ea, count in internal.comment.globals.iterate() if source <= ea < source + size]
     logging.info(u"{:s}.segm_moved({:#x}, {:#x}, {:+#x}) : Relocating tagcache for segment {:s}.".format(__name__, source, destination, size, get_segment_name(seg)))
     count = sum(map(len, [functions, globals]))
 
+    # If there's nothing in the segment that we need to relocate, then we can
+    # avoid bothering the user with a progress bar. We still need to consume the
+    # function relocation, though, so that any stray contents get cleaned up.
+    if not count:
+        logging.info(u"{:s}.segm_moved({:#x}, {:#x}, {:+#x}) : Skipping progress for segment {:s} due to it not having any functions or globals to relocate.".format(__name__, source, destination, size, get_segment_name(seg)))
+        for i, offset in __relocate_function(source, destination, size, iter(functions), moved=not changed_netmap):
+            continue
+        return
+
     # Create our progress bar that includes a title describing what's going on and
     # output it to the console so the user can see it.
     P, msg = ui.Progress(), u"Relocating tagcache for segment {:s}: {:#x} ({:+#x}) -> {:#x}".format(get_segment_name(seg), source, size, destination)
     P.update(current=0, min=0, max=count, title=msg), six.print_(msg)
     P.open()
 
+    # Refreshing the progress bar isn't free, so we track the last time we did it.
+    updated, interval = 0.0, 0.05
+
     # Iterate through each function that we're moving and relocate its contents.
-    for i, offset in __relocate_function(source, destination, size, (item for item in functions), moved=not changed_netmap):
+    for i, offset in __relocate_function(source, destination, size, iter(functions), moved=not changed_netmap):
+        now = time.time()
+        if now - updated < interval:
+            continue
         name = database.name(destination + offset)
         text = u"Relocating function {:d} of {:d}{:s}: {:#x} -> {:#x}".format(1 + i, len(functions), " ({:s})".format(name) if name else '', source + offset, destination + offset)
         P.update(value=i, text=text)
         ui.navigation.procedure(destination + offset)
+        updated = now
 
     # Iterate through each global that we're moving (we use the target address, because IDA moved everything already).
-    for i, offset in __relocate_globals(source, destination, size, (item for item in globals)):
+    for i, offset in __relocate_globals(source, destination, size, iter(globals)):
+        now = time.time()
+        if now - updated < interval:
+            continue
         name = database.name(destination + offset)
         text = u"Relocating global {:d} of {:d}{:s}: {:#x} -> {:#x}".format(1 + i, len(globals), " ({:s})".format(name) if name else '', source + offset, destination + offset)
         P.update(value=len(functions) + i, text=text)
         ui.navigation.analyze(destination + offset)
+        updated = now
+
+    # Now that we're done, update the progress bar so that it shows that we completed.
+    P.update(value=count)
     P.close()
 
 # address naming
@@ -1405,6 +1553,9 @@ class extra_cmt(changingchanged):
     """
     MAX_ITEM_LINES = (idaapi.E_NEXT - idaapi.E_PREV) if idaapi.E_NEXT > idaapi.E_PREV else idaapi.E_PREV - idaapi.E_NEXT
 
+    # The line indices for the prefix and suffix are constant, so we only need to calculate their boundaries once.
+    PREFIX, SUFFIX = (idaapi.E_PREV, idaapi.E_PREV + MAX_ITEM_LINES), (idaapi.E_NEXT, idaapi.E_NEXT + MAX_ITEM_LINES)
+
     @classmethod
     def Fcount(cls, ea, base):
         sup = internal.netnode.sup
@@ -1415,28 +1566,32 @@ class extra_cmt(changingchanged):
 
     @classmethod
     def is_prefix(cls, line_idx):
-        return idaapi.E_PREV <= line_idx < idaapi.E_PREV + cls.MAX_ITEM_LINES
+        left, right = cls.PREFIX
+        return left <= line_idx < right
 
     @classmethod
     def is_suffix(cls, line_idx):
-        return idaapi.E_NEXT <= line_idx < idaapi.E_NEXT + cls.MAX_ITEM_LINES
+        left, right = cls.SUFFIX
+        return left <= line_idx < right
 
     @classmethod
     def changed(cls, ea, line_idx, cmt):
+        debug = logging.root.isEnabledFor(logging.DEBUG)
         if not cls.is_ready():
-            return logging.debug(u"{:s}.changed({:#x}, {:d}, {!r}) : Ignoring extra_cmt.changed event (database not ready) for extra comment at index {:d} for {:#x}.".format('.'.join([__name__, cls.__name__]), ea, line_idx, cmt, line_idx, ea))
+            return logging.debug(u"{:s}.changed({:#x}, {:d}, {!r}) : Ignoring extra_cmt.changed event (database not ready) for extra comment at index {:d} for {:#x}.".format('.'.join([__name__, cls.__name__]), ea, line_idx, cmt, line_idx, ea)) if debug else None
         if interface.node.is_identifier(ea):
-            return logging.debug(u"{:s}.changed({:#x}, {:d}, {!r}) : Ignoring extra_cmt.changed event (not an address) for extra comment at index {:d} for {:#x}.".format('.'.join([__name__, cls.__name__]), ea, line_idx, cmt, line_idx, ea))
+            return logging.debug(u"{:s}.changed({:#x}, {:d}, {!r}) : Ignoring extra_cmt.changed event (not an address) for extra comment at index {:d} for {:#x}.".format('.'.join([__name__, cls.__name__]), ea, line_idx, cmt, line_idx, ea)) if debug else None
 
         # Verify that the address is within our database boundaries because IDA
         # can actually create "extra" comments outside of the database.
         try:
             ea = interface.address.within(ea)
         except E.OutOfBoundsError:
-            return logging.debug(u"{:s}.changed({:#x}, {:d}, {!r}) : Ignoring comment.changed event (not a valid address) for extra comment at index {:d} for {:#x}.".format('.'.join([__name__, cls.__name__]), ea, line_idx, cmt, line_idx, ea))
+            return logging.debug(u"{:s}.changed({:#x}, {:d}, {!r}) : Ignoring comment.changed event (not a valid address) for extra comment at index {:d} for {:#x}.".format('.'.join([__name__, cls.__name__]), ea, line_idx, cmt, line_idx, ea)) if debug else None
 
         # Determine whether we'll be updating the contents or a global.
-        logging.debug(u"{:s}.changed({:#x}, {:d}, {!r}) : Processing event at address {:#x} for index {:d}.".format('.'.join([__name__, cls.__name__]), ea, line_idx, utils.string.repr(cmt), ea, line_idx))
+        if debug:
+            logging.debug(u"{:s}.changed({:#x}, {:d}, {!r}) : Processing event at address {:#x} for index {:d}.".format('.'.join([__name__, cls.__name__]), ea, line_idx, utils.string.repr(cmt), ea, line_idx))
         ctx = internal.comment.contents if idaapi.get_func(ea) else internal.comment.globals
 
         # Figure out what the line_idx boundaries are so that we can use it to check
@@ -1451,7 +1606,7 @@ class extra_cmt(changingchanged):
         # Check if this is not the first line_idx. If it isn't, then we can simply leave
         # because all we care about is whether there's a comment here or not.
         if line_idx not in {base_idx}:
-            return logging.debug(u"{:s}.changed({:#x}, {:d}, {!r}) : Exiting event for address {:#x} due to the index ({:d}) not pointing to the comment start ({:d}).".format('.'.join([__name__, cls.__name__]), ea, line_idx, cmt, ea, line_idx, base_idx))
+            return logging.debug(u"{:s}.changed({:#x}, {:d}, {!r}) : Exiting event for address {:#x} due to the index ({:d}) not pointing to the comment start ({:d}).".format('.'.join([__name__, cls.__name__]), ea, line_idx, cmt, ea, line_idx, base_idx)) if debug else None
 
         # Now we need to figure out whether we've added an extra_cmt, or removed it.
         if cmt is None:
@@ -1470,18 +1625,19 @@ class extra_cmt(changingchanged):
         it uses can be reused if the workaround methodology of zero'ing the refcount
         for the entire address is applied.
         """
+        debug = logging.root.isEnabledFor(logging.DEBUG)
 
         # First check that we're not an identifier, because we don't care about
         # caching these.
         if interface.node.is_identifier(ea):
-            return logging.debug(u"{:s}.changed_multiple({:#x}, {:d}, {!r}) : Ignoring comment.changed event (not an address) for extra comment at index {:d} for {:#x}.".format('.'.join([__name__, cls.__name__]), ea, line_idx, cmt, line_idx, ea))
+            return logging.debug(u"{:s}.changed_multiple({:#x}, {:d}, {!r}) : Ignoring comment.changed event (not an address) for extra comment at index {:d} for {:#x}.".format('.'.join([__name__, cls.__name__]), ea, line_idx, cmt, line_idx, ea)) if debug else None
 
         # Verify that the address is within our database boundaries because IDA
         # can actually create "extra" comments outside of the database.
         try:
             ea = interface.address.within(ea)
         except E.OutOfBoundsError:
-            return logging.debug(u"{:s}.changed_multiple({:#x}, {:d}, {!r}) : Ignoring comment.changed event (not a valid address) for extra comment at index {:d} for {:#x}.".format('.'.join([__name__, cls.__name__]), ea, line_idx, cmt, line_idx, ea))
+            return logging.debug(u"{:s}.changed_multiple({:#x}, {:d}, {!r}) : Ignoring comment.changed event (not a valid address) for extra comment at index {:d} for {:#x}.".format('.'.join([__name__, cls.__name__]), ea, line_idx, cmt, line_idx, ea)) if debug else None
 
         # XXX: this function is now busted in later versions of IDA because for some
         #      reason, Ilfak, is now updating the extra comment prior to dispatching
@@ -1494,18 +1650,19 @@ class extra_cmt(changingchanged):
 
         oldcmt = internal.netnode.sup.get(ea, line_idx, type=memoryview)
         if oldcmt is not None: oldcmt = oldcmt.tobytes().rstrip(b'\0')
-        logging.debug(u"{:s}.changed_multiple({:#x}, {:d}, {!r}) : Processing event at address {:#x} for line {:d} with previous comment set to {!r}.".format('.'.join([__name__, cls.__name__]), ea, line_idx, cmt, ea, line_idx, oldcmt))
+        if debug:
+            logging.debug(u"{:s}.changed_multiple({:#x}, {:d}, {!r}) : Processing event at address {:#x} for line {:d} with previous comment set to {!r}.".format('.'.join([__name__, cls.__name__]), ea, line_idx, cmt, ea, line_idx, oldcmt))
         ctx = internal.comment.contents if idaapi.get_func(ea) else internal.comment.globals
 
-        MAX_ITEM_LINES = (idaapi.E_NEXT - idaapi.E_PREV) if idaapi.E_NEXT > idaapi.E_PREV else idaapi.E_PREV - idaapi.E_NEXT
-        prefix = (idaapi.E_PREV, idaapi.E_PREV + MAX_ITEM_LINES, '__extra_prefix__')
-        suffix = (idaapi.E_NEXT, idaapi.E_NEXT + MAX_ITEM_LINES, '__extra_suffix__')
+        prefix = cls.PREFIX + ('__extra_prefix__',)
+        suffix = cls.SUFFIX + ('__extra_suffix__',)
 
         for l, r, key in [prefix, suffix]:
             if l <= line_idx < r:
                 if oldcmt is None and cmt is not None: ctx.inc(ea, key)
                 elif oldcmt is not None and cmt is None: ctx.dec(ea, key)
-                logging.debug(u"{:s}.changed_multiple({:#x}, {:d}, {!r}, oldcmt={!r}) : {:s} reference count at address for tag {!r}.".format('.'.join([__name__, cls.__name__]), ea, line_idx, cmt, oldcmt, 'Increasing' if oldcmt is None and cmt is not None else 'Decreasing' if oldcmt is not None and cmt is None else 'Doing nothing to', key))
+                if debug:
+                    logging.debug(u"{:s}.changed_multiple({:#x}, {:d}, {!r}, oldcmt={!r}) : {:s} reference count at address for tag {!r}.".format('.'.join([__name__, cls.__name__]), ea, line_idx, cmt, oldcmt, 'Increasing' if oldcmt is None and cmt is not None else 'Decreasing' if oldcmt is not None and cmt is None else 'Doing nothing to', key))
             continue
         return
 
@@ -1548,39 +1705,36 @@ def func_tail_appended(pfn, tail):
     demote the tags for the tail from globals to contents tags. If there's more
     than one, then we simply add the references in the tail to the function.
     """
-    bounds = interface.range.bounds(tail)
-    referrers = [fn for fn in function.chunk.owners(bounds.left)]
-
-    # If the number of referrers is larger than just 1, then the tail is
-    # owned by more than one function. We still doublecheck, though, to
-    # ensure that our pfn is still in the list.
-    if len(referrers) > 1:
-        if not operator.contains(referrers, interface.range.start(pfn)):
-            logging.warning(u"{:s}.func_tail_appended({:#x}, {!s}) : Adjusting contents of function ({:#x}) but function was not found in the owners ({:s}) of chunk {!s}.".format(__name__, interface.range.start(pfn), bounds, interface.range.start(pfn), ', '.join(map("{:#x}".format, referrers)), bounds))
-
-        # Now we just need to iterate through the tail, and tally up
-        # the tags for the function in pfn.
-        for ea in database.address.iterate(bounds):
-            for k in database.tag(ea):
-                internal.comment.contents.inc(ea, k, target=interface.range.start(pfn))
-                logging.debug(u"{:s}.func_tail_appended({:#x}, {!s}) : Adding reference for tag ({:s}) at {:#x} to cache for function {:#x}.".format(__name__, interface.range.start(pfn), bounds, utils.string.repr(k), ea, interface.range.start(pfn)))
-            continue
-        return
-
-    # Otherwise if there was only one referrer, then that means this
-    # tail is being demoted from globals tags to contents that are
-    # owned by the function in pfn.
-    if not operator.contains(referrers, interface.range.start(pfn)):
-        logging.warning(u"{:s}.func_tail_appended({:#x}, {!s}) : Demoting globals in {!s} and adding them to the cache for function {:#x} but function was not found in the owners ({:s}) of chunk {!s}.".format(__name__, interface.range.start(pfn), bounds, bounds, interface.range.start(pfn), ', '.join(map("{:#x}".format, referrers)), bounds))
-
-    # All we need to do is to iterate through the tail, and adjust
-    # any references by exchanging them with the cache for pfn.
-    for ea in database.address.iterate(bounds):
-        for k in database.tag(ea):
-            internal.comment.globals.dec(ea, k)
-            internal.comment.contents.inc(ea, k, target=interface.range.start(pfn))
-            logging.debug(u"{:s}.func_tail_appended({:#x}, {!s}) : Exchanging (decreasing) reference count for global tag ({:s}) at {:#x} and (increasing) reference count for contents tag in the cache for function {:#x}.".format(__name__, interface.range.start(pfn), bounds, utils.string.repr(k), ea, interface.range.start(pfn)))
+    debug = logging.root.isEnabledFor(logging.DEBUG)
+    start, bounds = interface.range.start(pfn), interface.range.bounds(tail)
+    referrers = {fn for fn in function.chunk.owners(bounds.left)}
+
+    # If the number of referrers is larger than just 1, then the tail is owned
+    # by more than one function and we only need to add its tags to the cache
+    # for pfn. Otherwise, the tail is being demoted from globals tags to contents
+    # that are owned by pfn. Either way, we doublecheck that pfn is an owner.
+    shared = len(referrers) > 1
+    if start not in referrers and shared:
+        logging.warning(u"{:s}.func_tail_appended({:#x}, {!s}) : Adjusting contents of function ({:#x}) but function was not found in the owners ({:s}) of chunk {!s}.".format(__name__, start, bounds, start, ', '.join(map("{:#x}".format, sorted(referrers))), bounds))
+    elif start not in referrers:
+        logging.warning(u"{:s}.func_tail_appended({:#x}, {!s}) : Demoting globals in {!s} and adding them to the cache for function {:#x} but function was not found in the owners ({:s}) of chunk {!s}.".format(__name__, start, bounds, bounds, start, ', '.join(map("{:#x}".format, sorted(referrers))), bounds))
+
+    # Now we just need to iterate through the tail, and tally up the tags
+    # at each address so that we can adjust their references in one batch.
+    tagged = {}
+    for ea in interface.range.heads(*bounds):
+        available = {k for k in database.tag(ea)}
+        if available:
+            tagged[ea] = available
+            if debug:
+                logging.debug(u"{:s}.func_tail_appended({:#x}, {!s}) : Adding references for tags ({:s}) at {:#x} to the cache for function {:#x}{:s}.".format(__name__, start, bounds, utils.string.repr(available), ea, start, '' if shared else ' and removing them from the globals'))
         continue
+
+    # If the tail isn't shared, then we exchange the references from the
+    # globals. Otherwise we only need to add them to the cache for pfn.
+    if not shared:
+        internal.comment.globals.dec_all(tagged)
+    internal.comment.contents.inc_all(tagged, target=start)
     return
 
 def removing_func_tail(pfn, tail):
@@ -1590,13 +1744,14 @@ def removing_func_tail(pfn, tail):
     the tail to globals tags. Otherwise, we just decrease the reference count
     in the cache for the function that the tail was removed from.
     """
-    bounds = interface.range.bounds(tail)
-    referrers = [fn for fn in function.chunk.owners(bounds.left)]
+    debug = logging.root.isEnabledFor(logging.DEBUG)
+    start, bounds = interface.range.start(pfn), interface.range.bounds(tail)
+    referrers = {fn for fn in function.chunk.owners(bounds.left)}
 
     # Before we do anything, we need to make sure we can iterate through the
     # boundaries in the database that we're supposed to act upon.
     try:
-        iterable = database.address.iterate(bounds)
+        iterable = interface.range.heads(*interface.address.within(*bounds))
 
     # If the address is out of bounds, then IDA removed this tail completely from
     # the database and we need to manually delete the tail's contents. Since we
@@ -1606,37 +1761,36 @@ def removing_func_tail(pfn, tail):
 
         results = remove_contents(pfn, iterable)
         for tag, items in results.items():
-            logging.debug(u"{:s}.removing_func_tail({:#x}, {!s}) : Removed {:d} instances of tag ({:s}) that were associated with a removed tail.".format(__name__, interface.range.start(pfn), bounds, len(items), utils.string.repr(tag)))
+            if debug:
+                logging.debug(u"{:s}.removing_func_tail({:#x}, {!s}) : Removed {:d} instances of tag ({:s}) that were associated with a removed tail.".format(__name__, start, bounds, len(items), utils.string.repr(tag)))
         return
 
     # If the number of referrers is larger than 1, then the tail was just removed
-    # from the pfn function. We verify that the pfn is still in the list of
-    # referrers and warn the user if it isn't.
-    if len(referrers) > 1:
-        if not operator.contains(referrers, interface.range.start(pfn)):
-            logging.warning(u"{:s}.removing_func_tail({:#x}, {!s}) : Adjusting contents of function ({:#x}) but function was not found in the owners ({:s}) of chunk {!s}.".format(__name__, interface.range.start(pfn), bounds, interface.range.start(pfn), ', '.join(map("{:#x}".format, referrers)), bounds))
-
-        # So there's no promotion from a contents tag to a global tag, but
-        # there is a removal from the cache for pfn.
-        for ea in iterable:
-            for k in database.tag(ea):
-                internal.comment.contents.dec(ea, k, target=interface.range.start(pfn))
-                logging.debug(u"{:s}.removing_func_tail({:#x}, {!s}) : Decreasing reference for tag ({:s}) at {:#x} in cache for function {:#x}.".format(__name__, interface.range.start(pfn), bounds, utils.string.repr(k), ea, interface.range.start(pfn)))
-            continue
-        return
-
-    # Otherwise, there's just one referrer and it should be pointing to pfn.
-    if not operator.contains(referrers, interface.range.start(pfn)):
-        logging.warning(u"{:s}.removing_func_tail({:#x}, {!s}) : Promoting contents for function ({:#x}) but function was not found in the owners ({:s}) of chunk {!s}.".format(__name__, interface.range.start(pfn), bounds, interface.range.start(pfn), ', '.join(map("{:#x}".format, referrers)), bounds))
-
-    # If there's just one referrer, then the referrer should be pfn and we should
-    # be promoting the relevant addresses in the cache from contents to globals.
+    # from the pfn function and we only need to remove its tags from the cache.
+    # Otherwise, there's just one referrer and we need to promote the tags from
+    # contents to globals. Either way, we verify that pfn is still an owner.
+    shared = len(referrers) > 1
+    if start not in referrers and shared:
+        logging.warning(u"{:s}.removing_func_tail({:#x}, {!s}) : Adjusting contents of function ({:#x}) but function was not found in the owners ({:s}) of chunk {!s}.".format(__name__, start, bounds, start, ', '.join(map("{:#x}".format, sorted(referrers))), bounds))
+    elif start not in referrers:
+        logging.warning(u"{:s}.removing_func_tail({:#x}, {!s}) : Promoting contents for function ({:#x}) but function was not found in the owners ({:s}) of chunk {!s}.".format(__name__, start, bounds, start, ', '.join(map("{:#x}".format, sorted(referrers))), bounds))
+
+    # Now we can iterate through the tail, and tally up the tags at each
+    # address so that we can adjust their references in one batch.
+    tagged = {}
     for ea in iterable:
-        for k in database.tag(ea):
-            internal.comment.contents.dec(ea, k, target=interface.range.start(pfn))
-            internal.comment.globals.inc(ea, k)
-            logging.debug(u"{:s}.removing_func_tail({:#x}, {!s}) : Exchanging (increasing) reference count for global tag ({:s}) at {:#x} and (decreasing) reference count for contents tag in the cache for function {:#x}.".format(__name__, interface.range.start(pfn), bounds, utils.string.repr(k), ea, interface.range.start(pfn)))
+        available = {k for k in database.tag(ea)}
+        if available:
+            tagged[ea] = available
+            if debug:
+                logging.debug(u"{:s}.removing_func_tail({:#x}, {!s}) : Removing references for tags ({:s}) at {:#x} from the cache for function {:#x}{:s}.".format(__name__, start, bounds, utils.string.repr(available), ea, start, '' if shared else ' and adding them to the globals'))
         continue
+
+    # If the tail isn't shared, then we exchange the references into the
+    # globals. Otherwise we only need to remove them from the cache for pfn.
+    internal.comment.contents.dec_all(tagged, target=start)
+    if not shared:
+        internal.comment.globals.inc_all(tagged)
     return
 
 def func_tail_removed(pfn, ea):
@@ -1645,6 +1799,7 @@ def func_tail_removed(pfn, ea):
     We simply iterate through the old chunk, decrease all of its tags in the
     function context, and increase their reference within the global context.
     """
+    debug = logging.root.isEnabledFor(logging.DEBUG)
 
     # first we'll grab the addresses from our refs
     listable = internal.comment.contents.address(ea, target=interface.range.start(pfn))
@@ -1663,12 +1818,16 @@ def func_tail_removed(pfn, ea):
 
     # now iterate through the min/max of the list as hopefully this is
     # our event.
-    for ea in database.address.iterate(min(missing), max(missing)):
-        for k in database.tag(ea):
-            internal.comment.contents.dec(ea, k, target=interface.range.start(pfn))
-            internal.comment.globals.inc(ea, k)
-            logging.debug(u"{:s}.func_tail_removed({:#x}, {:#x}) : Exchanging (increasing) reference count for global tag {!s} and (decreasing) reference count for contents tag {!s}.".format(__name__, interface.range.start(pfn), ea, utils.string.repr(k), utils.string.repr(k)))
+    tagged = {}
+    for ea in interface.range.heads(min(missing), max(missing)):
+        available = {k for k in database.tag(ea)}
+        if available:
+            tagged[ea] = available
+            if debug:
+                logging.debug(u"{:s}.func_tail_removed({:#x}, {:#x}) : Exchanging (increasing) reference count for global tags {!s} and (decreasing) reference count for contents tags {!s}.".format(__name__, interface.range.start(pfn), ea, utils.string.repr(available), utils.string.repr(available)))
         continue
+    internal.comment.contents.dec_all(tagged, target=interface.range.start(pfn))
+    internal.comment.globals.inc_all(tagged)
     return
 
 def tail_owner_changed(tail, owner_func):
@@ -1678,16 +1837,21 @@ def tail_owner_changed(tail, owner_func):
     previous function's context, and increase their reference within the new
     function's context.
     """
+    debug = logging.root.isEnabledFor(logging.DEBUG)
     # XXX: this is for older versions of IDA
 
     # this is easy as we just need to walk through tail and add it
     # to owner_func
-    for ea in database.address.iterate(interface.range.bounds(tail)):
-        for k in database.tag(ea):
-            internal.comment.contents.dec(ea, k)
-            internal.comment.contents.inc(ea, k, target=owner_func)
-            logging.debug(u"{:s}.tail_owner_changed({:#x}, {:#x}) : Exchanging (increasing) reference count for contents tag {!s} and (decreasing) reference count for contents tag {!s}.".format(__name__, interface.range.start(tail), owner_func, utils.string.repr(k), utils.string.repr(k)))
+    tagged = {}
+    for ea in interface.range.heads(*interface.range.unpack(tail)):
+        available = {k for k in database.tag(ea)}
+        if available:
+            tagged[ea] = available
+            if debug:
+                logging.debug(u"{:s}.tail_owner_changed({:#x}, {:#x}) : Exchanging (increasing) reference count for contents tags {!s} and (decreasing) reference count for contents tags {!s}.".format(__name__, interface.range.start(tail), owner_func, utils.string.repr(available), utils.string.repr(available)))
         continue
+    internal.comment.contents.dec_all(tagged)
+    internal.comment.contents.inc_all(tagged, target=owner_func)
     return
 
 def add_func(pfn):
@@ -1697,12 +1861,11 @@ def add_func(pfn):
     from global tags to function tags. This iterates through each chunk belonging
     to the function and does exactly that.
     """
+    debug = logging.root.isEnabledFor(logging.DEBUG)
     implicit = {'__typeinfo__', '__name__'}
 
     # figure out the newly added function's address, and gather all the imports.
-    ea, imports = interface.range.start(pfn), {item for item in []}
-    for idx in range(idaapi.get_import_module_qty()):
-        idaapi.enum_import_names(idx, lambda address, name, ordinal: imports.add(address) or True)
+    ea, imports = interface.range.start(pfn), __collect_imports()
 
     # check that we're not adding an import as a function. if this happens,
     # then this is because IDA's ELF loader seems to be loading this.
@@ -1719,15 +1882,21 @@ def add_func(pfn):
 
     # convert all globals into contents whilst making sure that we don't
     # add any of the implicit tags that are handled by other events.
-    for l, r in function.chunks(ea):
-        for ea in database.address.iterate(l, r):
-            available = {item for item in database.tag(ea)}
-            for k in available - implicit:
-                internal.comment.globals.dec(ea, k)
-                internal.comment.contents.inc(ea, k, target=interface.range.start(pfn))
-                logging.debug(u"{:s}.add_func({:#x}) : Exchanging (decreasing) reference count for global tag {!s} and (increasing) reference count for contents tag {!s}.".format(__name__, interface.range.start(pfn), utils.string.repr(k), utils.string.repr(k)))
+    fn, tagged = interface.range.start(pfn), {}
+    chunks = [bounds for bounds in function.chunks(ea)]
+    for l, r in chunks:
+        for ea in interface.range.heads(l, r):
+            available = {item for item in database.tag(ea)} - implicit
+            if available:
+                tagged[ea] = available
+                if debug:
+                    logging.debug(u"{:s}.add_func({:#x}) : Exchanging (decreasing) reference count for global tags {!s} and (increasing) reference count for contents tags {!s}.".format(__name__, fn, utils.string.repr(available), utils.string.repr(available)))
             continue
         continue
+
+    # now we can exchange the references for every address in a single batch.
+    internal.comment.globals.dec_all(tagged)
+    internal.comment.contents.inc_all(tagged, target=fn)
     return
 
 def remove_contents(fn, iterable):
@@ -1773,6 +1942,7 @@ def del_func(pfn):
     and then increasing it for the database. Afterwards we simply remove the
     reference count cache for the function.
     """
+    debug = logging.root.isEnabledFor(logging.DEBUG)
 
     try:
         rt, fn = interface.addressOfRuntimeOrStatic(pfn)
@@ -1796,13 +1966,15 @@ def del_func(pfn):
 
         results = remove_contents(pfn, iterable)
         for tag, items in results.items():
-            logging.debug(u"{:s}.del_func({:#x}) : Removed {:d} instances of tag ({:s}) that were associated with a removed function.".format(__name__, interface.range.start(pfn), len(items), utils.string.repr(tag)))
+            if debug:
+                logging.debug(u"{:s}.del_func({:#x}) : Removed {:d} instances of tag ({:s}) that were associated with a removed function.".format(__name__, interface.range.start(pfn), len(items), utils.string.repr(tag)))
 
         # Now we need to remove the global tags associated with this function.
         items = idaapi.get_func_cmt(pfn, True), idaapi.get_func_cmt(pfn, False)
         repeatable, nonrepeatable = (internal.comment.decode(item) for item in items)
 
-        logging.debug(u"{:s}.del_func({:#x}) : Removing both repeatable references ({:d}) and non-repeatable references ({:d}) from {:s} ({:#x}).".format(__name__, interface.range.start(pfn), len(repeatable), len(nonrepeatable), 'globals', fn))
+        if debug:
+            logging.debug(u"{:s}.del_func({:#x}) : Removing both repeatable references ({:d}) and non-repeatable references ({:d}) from {:s} ({:#x}).".format(__name__, interface.range.start(pfn), len(repeatable), len(nonrepeatable), 'globals', fn))
 
         # After decoding them, we can try to decrease our reference count.
         [ internal.comment.globals.dec(fn, k) for k in repeatable ]
@@ -1822,21 +1994,36 @@ def del_func(pfn):
         return
 
     # convert all contents into globals
+    tagged = {}
     for ea in internal.comment.contents.address(fn, target=fn):
-        for k in database.tag(ea):
-            internal.comment.contents.dec(ea, k, target=fn)
-            internal.comment.globals.inc(ea, k)
-            logging.debug(u"{:s}.del_func({:#x}) : Exchanging (increasing) reference count for global tag {!s} and (decreasing) reference count for contents tag {!s}.".format(__name__, interface.range.start(pfn), utils.string.repr(k), utils.string.repr(k)))
+        available = {k for k in database.tag(ea)}
+        if available:
+            tagged[ea] = available
+            if debug:
+                logging.debug(u"{:s}.del_func({:#x}) : Exchanging (increasing) reference count for global tags {!s} and (decreasing) reference count for contents tags {!s}.".format(__name__, interface.range.start(pfn), utils.string.repr(available), utils.string.repr(available)))
         continue
+    internal.comment.contents.dec_all(tagged, target=fn)
+    internal.comment.globals.inc_all(tagged)
 
     # remove all function tags depending on whether our address
     # is part of a function, runtime-linked, or neither.
     Ftags = database.tag if rt else function.tag
     for k in Ftags(fn):
         internal.comment.globals.dec(fn, k)
-        logging.debug(u"{:s}.del_func({:#x}) : Removing (global) tag {!s} from function.".format(__name__, fn, utils.string.repr(k)))
+        if debug:
+            logging.debug(u"{:s}.del_func({:#x}) : Removing (global) tag {!s} from function.".format(__name__, fn, utils.string.repr(k)))
     return
 
+def __collect_tags(start, stop):
+    '''Return a dictionary containing the tag names for each address from `start` up to `stop` (exclusive) that has been tagged.'''
+    result, tag = {}, database.tag
+    for ea in interface.range.heads(start, stop):
+        available = {k for k in tag(ea)}
+        if available:
+            result[ea] = available
+        continue
+    return result
+
 def set_func_start(pfn, new_start):
     """This is called when the user changes the beginning of the function to another address.
 
@@ -1844,27 +2031,28 @@ def set_func_start(pfn, new_start):
     the function that was changed. Then we can update the reference count for
     any globals that were tagged by moving them into the function's tagcache.
     """
+    debug = logging.root.isEnabledFor(logging.DEBUG)
+
+    fn = interface.range.start(pfn)
 
     # if new_start has removed addresses from function, then we need to transform
     # all contents tags into globals tags
-    if interface.range.start(pfn) > new_start:
-        for ea in database.address.iterate(new_start, interface.range.start(pfn)):
-            for k in database.tag(ea):
-                internal.comment.contents.dec(ea, k, target=interface.range.start(pfn))
-                internal.comment.globals.inc(ea, k)
-                logging.debug(u"{:s}.set_func_start({:#x}, {:#x}) : Exchanging (increasing) reference count for global tag {!s} and (decreasing) reference count for contents tag {!s}.".format(__name__, interface.range.start(pfn), new_start, utils.string.repr(k), utils.string.repr(k)))
-            continue
+    if fn > new_start:
+        tagged = __collect_tags(new_start, fn)
+        internal.comment.contents.dec_all(tagged, target=fn)
+        internal.comment.globals.inc_all(tagged)
+        if debug:
+            logging.debug(u"{:s}.set_func_start({:#x}, {:#x}) : Exchanged (increased) reference count for global tags and (decreased) reference count for contents tags at {:d} address{:s} ({:s}).".format(__name__, fn, new_start, len(tagged), '' if len(tagged) == 1 else 'es', ', '.join(map("{:#x}".format, sorted(tagged)))))
         return
 
     # if new_start has added addresses to function, then we need to transform all
     # its global tags into contents tags
-    elif interface.range.start(pfn) < new_start:
-        for ea in database.address.iterate(interface.range.start(pfn), new_start):
-            for k in database.tag(ea):
-                internal.comment.globals.dec(ea, k)
-                internal.comment.contents.inc(ea, k, target=interface.range.start(pfn))
-                logging.debug(u"{:s}.set_func_start({:#x}, {:#x}) : Exchanging (decreasing) reference count for global tag {!s} and (increasing) reference count for contents tag {!s}.".format(__name__, interface.range.start(pfn), new_start, utils.string.repr(k), utils.string.repr(k)))
-            continue
+    elif fn < new_start:
+        tagged = __collect_tags(fn, new_start)
+        internal.comment.globals.dec_all(tagged)
+        internal.comment.contents.inc_all(tagged, target=fn)
+        if debug:
+            logging.debug(u"{:s}.set_func_start({:#x}, {:#x}) : Exchanged (decreased) reference count for global tags and (increased) reference count for contents tags at {:d} address{:s} ({:s}).".format(__name__, fn, new_start, len(tagged), '' if len(tagged) == 1 else 'es', ', '.join(map("{:#x}".format, sorted(tagged)))))
         return
     return
 
@@ -1875,28 +2063,43 @@ def set_func_end(pfn, new_end):
     end of the function that was changed. Then we can update the reference count
     for any globals that were tagged by moving them into the function's tagcache.
     """
+    debug = logging.root.isEnabledFor(logging.DEBUG)
 
-    # if new_end has added addresses to function, then we need to transform
-    # all globals tags into contents tags
-    if new_end > interface.range.end(pfn):
-        for ea in database.address.iterate(interface.range.end(pfn), new_end):
-            for k in database.tag(ea):
-                internal.comment.globals.dec(ea, k)
-                internal.comment.contents.inc(ea, k, target=interface.range.start(pfn))
-                logging.debug(u"{:s}.set_func_end({:#x}, {:#x}) : Exchanging (decreasing) reference count for global tag {!s} and (increasing) reference count for contents tag {!s}.".format(__name__, interface.range.start(pfn), new_end, utils.string.repr(k), utils.string.repr(k)))
-            continue
+    fn, end = interface.range.unpack(pfn)
+    if new_end == end:
         return
 
-    # if new_end has removed addresses from function, then we need to transform
-    # all contents tags into globals tags
-    elif new_end < interface.range.end(pfn):
-        for ea in database.address.iterate(new_end, interface.range.end(pfn)):
-            for k in database.tag(ea):
-                internal.comment.contents.dec(ea, k, target=interface.range.start(pfn))
-                internal.comment.globals.inc(ea, k)
-                logging.debug(u"{:s}.set_func_end({:#x}, {:#x}) : Exchanging (increasing) reference count for global tag {!s} and (decreasing) reference count for contents tag {!s}.".format(__name__, interface.range.start(pfn), new_end, utils.string.repr(k), utils.string.repr(k)))
-            continue
-        return
+    # if new_end has added addresses to the function, then we need to transform all
+    # of the globals tags into contents tags. otherwise, new_end has removed them
+    # and we need to transform all of the contents tags into globals tags.
+    added = new_end > end
+    left, right = (end, new_end) if added else (new_end, end)
+
+    # if the database is ready, then every tag is tracked by the cache and we can
+    # check it to avoid walking a range that doesn't have any tags. the globals are
+    # checked for the addresses being added, and the contents for the ones removed.
+    if changingchanged.is_ready():
+        if added:
+            tracked = internal.comment.globals.has(left, right)
+        else:
+            listable = internal.comment.contents.address(fn, target=fn)
+            index = bisect.bisect_left(listable, left)
+            tracked = index < len(listable) and listable[index] < right
+
+        if not tracked:
+            return
+
+    # now we can collect the tags from the range and exchange them in one batch.
+    tagged = __collect_tags(left, right)
+    if added:
+        internal.comment.globals.dec_all(tagged)
+        internal.comment.contents.inc_all(tagged, target=fn)
+    else:
+        internal.comment.contents.dec_all(tagged, target=fn)
+        internal.comment.globals.inc_all(tagged)
+
+    if debug:
+        logging.debug(u"{:s}.set_func_end({:#x}, {:#x}) : Exchanged ({:s}) reference count for global tags and ({:s}) reference count for contents tags at {:d} address{:s} ({:s}).".format(__name__, fn, new_end, 'decreased' if added else 'increased', 'increased' if added else 'decreased', len(tagged), '' if len(tagged) == 1 else 'es', ', '.join(map("{:#x}".format, sorted(tagged)))))
     return
 
 class supermethods(object):
@@ -2114,7 +2317,8 @@ def make_ida_not_suck_cocks(nw_code):
 
     elif idaapi.__version__ >= 6.9:
         ui.hook.idb.add('removing_func_tail', removing_func_tail, 0)
-        [ ui.hook.idp.add(item.__name__, item, 0) for item in [add_func, del_func, set_func_start, set_func_end] ]
+        for item in (add_func, del_func, set_func_start, set_func_end):
+            ui.hook.idp.add(item.__name__, item, 0)
 
     else:
         ui.hook.idb.add('func_tail_removed', func_tail_removed, 0)
@@ -2122,11 +2326,11 @@ def make_ida_not_suck_cocks(nw_code):
         ui.hook.idp.add('del_func', del_func, 0)
         ui.hook.idb.add('tail_owner_changed', tail_owner_changed, 0)
 
-    [ ui.hook.idb.add(item.__name__, item, 0) for item in [thunk_func_created, func_tail_appended] ]
+    ui.hook.idb.add('func_tail_appended', func_tail_appended, 0)
 
     ## Relocate the tagcache for an individual segment if that segment is moved.
-    ui.hook.idb.add('segm_start_changed', segm_start_changed, 0)
-    ui.hook.idb.add('segm_end_changed', segm_end_changed, 0)
+    ## Changing the boundaries of a segment doesn't affect any tags, so there's
+    ## no need to hook the "segm_start_changed" or "segm_end_changed" events.
     ui.hook.idb.add('segm_moved', segm_moved, 0)
 
     ## switch the instruction set when the processor is switched